@@ -1,18 +1,15 @@
 #!/usr/bin/env python3
 
+# Package paths and flags.
+#
+# IS_DEV, MMM_DIR and DB_PATH depend on the .env file and the user data dir,
+# they are resolved by __getattr__() on first access, so that importing the
+# package doesn't load dotenv and appdirs or create directories.
+
 import os
-import platform
+import sys
 from pathlib import Path
-from dotenv import load_dotenv
-import appdirs
-
-load_dotenv()
-
-s = os.getenv('DEV')
-if s is not None and s == "True":
-    IS_DEV = True
-else:
-    IS_DEV = False
+from typing import Any, Dict
 
 MMM_PACKAGE_DIR = Path(os.path.dirname(__file__)).absolute()
 
@@ -20,17 +17,39 @@ PACKAGE_QUOTES_PATH = MMM_PACKAGE_DIR.joinpath("assets/quotes.csv")
 
 MARKDOWN_DIR = MMM_PACKAGE_DIR.joinpath("assets/")
 
-s = os.getenv('MMM_DIR')
-if s is not None and s != '':
-    MMM_DIR = Path(s)
-else:
-    MMM_DIR = Path(appdirs.user_data_dir('mmm'))
+# sys.platform instead of platform.system(), importing platform is slow.
+IS_LINUX = sys.platform.startswith('linux')
+IS_WINDOWS = (sys.platform == 'win32')
+IS_MAC = (sys.platform == 'darwin')
+
+_resolved: Dict[str, Any] = dict()
+
+def _resolve() -> Dict[str, Any]:
+    if len(_resolved) > 0:
+        return _resolved
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    s = os.getenv('DEV')
+    is_dev = (s is not None and s == "True")
+
+    s = os.getenv('MMM_DIR')
+    if s is not None and s != '':
+        mmm_dir = Path(s)
+    else:
+        import appdirs
+        mmm_dir = Path(appdirs.user_data_dir('mmm'))
 
-DB_PATH = MMM_DIR.joinpath('appdata.sqlite3')
+    if not mmm_dir.exists():
+        mmm_dir.mkdir()
 
-if not MMM_DIR.exists():
-    MMM_DIR.mkdir()
+    _resolved['IS_DEV'] = is_dev
+    _resolved['MMM_DIR'] = mmm_dir
+    _resolved['DB_PATH'] = mmm_dir.joinpath('appdata.sqlite3')
+    return _resolved
 
-IS_LINUX = (platform.system() == 'Linux')
-IS_WINDOWS = (platform.system() == 'Windows')
-IS_MAC = (platform.system() == 'Darwin')
+def __getattr__(name: str) -> Any:
+    if name in ['IS_DEV', 'MMM_DIR', 'DB_PATH']:
+        return _resolve()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -2,32 +2,56 @@
 
 import json
 import datetime
+import importlib
+import sys
 from pathlib import Path
-from typing import Optional
-from rich.markdown import Markdown
+from typing import Dict, Optional, Tuple
 
 from textual.app import App
-from textual.widgets import Button, ButtonPressed, ScrollView
+from textual.widgets import Button, ButtonPressed, ScrollView, Static
 from textual.views._grid_view import GridView
 from memory_master_mind.components.footer import Footer
 
 import memory_master_mind.db as db
+import memory_master_mind.store as store
+import memory_master_mind.db_worker as db_worker
+import memory_master_mind.errors as errors
+import memory_master_mind.stats as stats
 from memory_master_mind import IS_DEV, MARKDOWN_DIR
 from memory_master_mind.components.home import HomeView
 
 from memory_master_mind.components.challenge_interface import ChallengeInterface
-from memory_master_mind.components.static_number_sequence import StaticNumSeqView
-from memory_master_mind.components.timed_number_sequence import TimedNumSeqView
-from memory_master_mind.components.math_arithmetic import MathArithmeticView
-from memory_master_mind.components.quotes import QuotesView
+from memory_master_mind.components.preferences_interface import PreferencesInterface
 
-from memory_master_mind.types import AppId, HomeId, StaticNumId, Stats, TimedNumId, MathArithId, QuotesId
-from memory_master_mind.types import app_load_settings, load_settings
+from memory_master_mind.types import HomeId, StaticNumId, Stats, TimedNumId, MathArithId, QuotesId
+from memory_master_mind.types import app_load_settings, app_save_settings, load_settings
+
+# Module and class of each challenge view. The module is imported when the
+# challenge is first opened, so startup only loads the last one.
+CHALLENGE_VIEWS: Dict[str, Tuple[str, str]] = {
+    StaticNumId: ("memory_master_mind.components.static_number_sequence", "StaticNumSeqView"),
+    TimedNumId: ("memory_master_mind.components.timed_number_sequence", "TimedNumSeqView"),
+    MathArithId: ("memory_master_mind.components.math_arithmetic", "MathArithmeticView"),
+    QuotesId: ("memory_master_mind.components.quotes", "QuotesView"),
+}
 
 class MmmApp(App):
     home: HomeView
     current_challenge: Optional[ChallengeInterface]
     menu_enabled: bool = True
+    # Views are built once and docked again when switching back to them.
+    # A widget stays registered with the app once mounted, so building a new
+    # one for each switch kept the old ones alive.
+    challenge_views: Dict[str, ChallengeInterface]
+    help_view: Optional[ScrollView] = None
+    help_footer: Optional[Footer] = None
+    # Updated in place, ScrollView.update() with a renderable would register
+    # a new widget each time.
+    help_text: Optional[Static] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.challenge_views = dict()
 
     async def on_load(self):
         await self.bind("h", "home", "Home")
@@ -39,7 +63,20 @@ class MmmApp(App):
     def toggle_menu(self):
         self.menu_enabled = not self.menu_enabled
 
+    def get_challenge_view(self, name: str) -> ChallengeInterface:
+        view = self.challenge_views.get(name)
+        if view is None:
+            module_name, class_name = CHALLENGE_VIEWS[name]
+            view = getattr(importlib.import_module(module_name), class_name)()
+            self.challenge_views[name] = view
+        return view
+
     async def dock_view(self, view: GridView):
+        self.flush_pending()
+        # Challenges which are not shown don't run their timers.
+        for v in self.challenge_views.values():
+            if v is not view:
+                v.challenge_timer.stop_timer()
         self.view.layout.docks.clear() # type: ignore
         self.view.widgets.clear()
         await self.view.dock(view, edge="top")
@@ -61,9 +98,12 @@ class MmmApp(App):
             return
 
         if self.current_challenge is None:
-            await self.dock_view(self.home.get_preferences_view())
+            view: PreferencesInterface = self.home.get_preferences_view()
         else:
-            await self.dock_view(self.current_challenge.get_preferences_view())
+            view = self.current_challenge.get_preferences_view()
+
+        await self.dock_view(view)
+        await view.reload_inputs()
 
     async def action_go_back(self):
         if not self.menu_enabled:
@@ -83,16 +123,22 @@ class MmmApp(App):
         self.view.layout.docks.clear() # type: ignore
         self.view.widgets.clear()
 
-        footer = Footer()
-        footer.scroll = True
-        footer.go_back = True
-        footer.new_challenge = False
-        footer.preferences = False
-        footer.show_answer = False
-        footer.show_help = False
-        footer.show_level = False
-
-        help_view = ScrollView(gutter=1)
+        if self.help_view is None or self.help_footer is None or self.help_text is None:
+            footer = Footer()
+            footer.scroll = True
+            footer.go_back = True
+            footer.new_challenge = False
+            footer.preferences = False
+            footer.show_answer = False
+            footer.show_help = False
+            footer.show_level = False
+            self.help_footer = footer
+            self.help_view = ScrollView(gutter=1)
+            self.help_text = Static("")
+
+        help_view = self.help_view
+        help_text = self.help_text
+        footer = self.help_footer
 
         await self.view.dock(help_view, edge="top")
         await self.view.dock(footer, edge="bottom", size=1, z=99)
@@ -105,9 +151,12 @@ class MmmApp(App):
             return
 
         async def get_markdown() -> None:
+            # rich.markdown loads commonmark and pygments, only needed here.
+            from rich.markdown import Markdown
             with open(md_path, "r", encoding="utf8") as f:
                 md = Markdown(f.read(), hyperlinks=True)
-            await help_view.update(md)
+            await help_text.update(md)
+            await help_view.update(help_text)
 
         await help_view.focus()
 
@@ -128,33 +177,35 @@ class MmmApp(App):
         if name in [StaticNumId, TimedNumId, MathArithId, QuotesId]:
             d = app_load_settings()
             d["last_challenge"] = name
-            db.save_settings(AppId, json.dumps(d))
+            app_save_settings(d)
 
         if name == HomeId:
             await self.action_home()
 
-        elif name == StaticNumId:
-            self.current_challenge = StaticNumSeqView()
-            await self.dock_view(self.current_challenge)
-
-        elif name == TimedNumId:
-            self.current_challenge = TimedNumSeqView()
-            await self.dock_view(self.current_challenge)
-
-        elif name == MathArithId:
-            self.current_challenge = MathArithmeticView()
-            await self.dock_view(self.current_challenge)
-
-        elif name == QuotesId:
-            self.current_challenge = QuotesView()
-            self.current_challenge.is_text_challenge = True
+        elif name in CHALLENGE_VIEWS:
+            self.current_challenge = self.get_challenge_view(name)
             await self.dock_view(self.current_challenge)
+            # The first mount starts a challenge in on_mount().
+            if self.current_challenge.has_mounted:
+                await self.current_challenge.resume()
 
     async def handle_button_pressed(self, message: ButtonPressed) -> None:
         if isinstance(message.sender, Button):
             await self.load_view(message.sender.name)
 
+    def flush_pending(self):
+        store.flush()
+        stats.flush()
+        self.log("db_worker", **db_worker.metrics())
+        for e in errors.take():
+            self.log("Error:", e)
+
     async def on_mount(self) -> None:
+        # Read all settings on the db thread, later reads are served from memory.
+        await db_worker.run(store.preload)
+
+        self.set_interval(store.FLUSH_INTERVAL_SECS, self.flush_pending)
+
         self.home = HomeView()
 
         d = app_load_settings()
@@ -162,51 +213,51 @@ class MmmApp(App):
 
     def save_stats(self):
         d = app_load_settings()
-        if not d['save_stats'] or d['stats_path'] == "":
+        if not d['save_stats']:
             return
 
-        stats_path = Path(d['stats_path']).expanduser()
-
         if self.current_challenge is None:
             return
 
-        secs = f"{self.current_challenge.input_answer.time_elapsed:.1f}"
-
         if d['stats_include_settings']:
-            s = load_settings(self.current_challenge.view_id)
-            a = list(map(lambda i: f"{i[0]}={i[1]}", s.items()))
-            setts = '"' + "|".join(a) + '"'
+            setts = json.dumps(load_settings(self.current_challenge.view_id))
         else:
             setts = ''
 
-        stats = Stats(
+        keys = self.current_challenge.input_answer.key_metrics()
+
+        stats_row = Stats(
             datetime=datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             challenge_name=self.current_challenge.view_id,
-            level=str(self.current_challenge.current_level),
-            solved_in_secs=secs,
-            first_try=str(self.current_challenge.first_try),
+            level=self.current_challenge.levels.level,
+            solved_in_secs=self.current_challenge.input_answer.time_elapsed,
+            first_try=self.current_challenge.first_try,
             settings=setts,
+            first_key_ms=keys['first_key_ms'],
+            mean_key_interval_ms=keys['mean_key_interval_ms'],
+            hesitations=keys['hesitations'],
+            item_pauses_ms="|".join(f"{x:.0f}" for x in keys['item_pauses_ms']),
         )
 
-        keys = stats.keys()
-        csv_header = ",".join(keys)
-
-        values = []
-        for k in keys:
-            values.append(stats[k])
-
-        csv_row = ",".join(values)
-
-        if not stats_path.exists():
-            with open(stats_path, "w", encoding="utf8") as f:
-                f.write(csv_header + "\n")
+        if d['stats_path'] != "":
+            csv_path = Path(d['stats_path']).expanduser()
+        else:
+            csv_path = None
 
-        with open(stats_path, "a", encoding="utf8") as f:
-            f.write(csv_row + "\n")
+        stats.record(stats_row, csv_path)
 
 def start():
     db.db_init()
-    if IS_DEV:
-        MmmApp.run(title="MMM", log="textual.log")
-    else:
-        MmmApp.run(title="MMM")
+    try:
+        if IS_DEV:
+            MmmApp.run(title="MMM", log="textual.log")
+        else:
+            MmmApp.run(title="MMM")
+    finally:
+        store.flush()
+        stats.flush()
+        db.close_connections()
+        db_worker.stop()
+        # The terminal is restored by now.
+        for e in errors.take():
+            print(e, file=sys.stderr)
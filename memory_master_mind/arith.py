@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+
+# Arithmetic expressions of the math challenge.
+#
+# The generated items (numbers and operators, e.g. ["12", "*", "-3", "+", "4"])
+# are converted to postfix order once and evaluated with exact integer and
+# Fraction arithmetic. A negative number is a single item, so "-3" is a number,
+# not an operator.
+#
+# Evaluation has a budget: the number of operations, and the size of every
+# intermediate result in bits. Expressions over the budget, division by zero
+# and such raise ExpressionError instead of stalling or crashing the UI.
+
+import math
+import random
+from fractions import Fraction
+from typing import TYPE_CHECKING, Dict, List, NamedTuple, Sequence, Tuple, Union
+
+if TYPE_CHECKING:
+    from memory_master_mind.types import Settings
+
+Number = Union[int, Fraction]
+
+# Precedence, and whether the operator is right associative.
+OPERATORS = {
+    "+": (1, False),
+    "-": (1, False),
+    "*": (2, False),
+    "/": (2, False),
+    "//": (2, False),
+    "%": (2, False),
+    "**": (3, True),
+}
+
+MAX_OPS = 10000
+# About 20,000 decimal digits.
+MAX_BITS = 1 << 16
+
+class ExpressionError(Exception):
+    pass
+
+class Answer(NamedTuple):
+    value: Number
+    # value as a decimal, truncated to the decimal places of the settings.
+    text: str
+    # False if text was truncated.
+    exact: bool
+
+def parse_number(token: str) -> int:
+    try:
+        return int(token)
+    except ValueError:
+        raise ExpressionError(f"Not a number: {token}")
+
+def to_postfix(tokens: Sequence[str]) -> List[str]:
+    """Reorders infix tokens to postfix with the shunting-yard algorithm."""
+    out: List[str] = []
+    stack: List[str] = []
+    for t in tokens:
+        if t in OPERATORS:
+            prec, right = OPERATORS[t]
+            while len(stack) > 0 and stack[-1] in OPERATORS:
+                top_prec = OPERATORS[stack[-1]][0]
+                if top_prec > prec or (top_prec == prec and not right):
+                    out.append(stack.pop())
+                else:
+                    break
+            stack.append(t)
+        elif t == "(":
+            stack.append(t)
+        elif t == ")":
+            while len(stack) > 0 and stack[-1] != "(":
+                out.append(stack.pop())
+            if len(stack) == 0:
+                raise ExpressionError("Unbalanced parentheses")
+            stack.pop()
+        else:
+            parse_number(t)
+            out.append(t)
+
+    while len(stack) > 0:
+        t = stack.pop()
+        if t == "(":
+            raise ExpressionError("Unbalanced parentheses")
+        out.append(t)
+
+    return out
+
+def bits(x: Number) -> int:
+    if isinstance(x, int):
+        return x.bit_length()
+    return x.numerator.bit_length() + x.denominator.bit_length()
+
+def apply_op(op: str, a: Number, b: Number, max_bits: int = MAX_BITS) -> Number:
+    if op == "+":
+        r = a + b
+    elif op == "-":
+        r = a - b
+    elif op == "*":
+        r = a * b
+    elif op in ("/", "//", "%"):
+        if b == 0:
+            raise ExpressionError("Division by zero")
+        if op == "/":
+            r = Fraction(a, b)
+        elif op == "//":
+            r = a // b
+        else:
+            r = a % b
+    elif op == "**":
+        if isinstance(b, Fraction) and b.denominator != 1:
+            raise ExpressionError("Fractional exponent")
+        e = int(b)
+        if a == 0 and e < 0:
+            raise ExpressionError("Division by zero")
+        # Check the size before computing it.
+        if abs(a) > 1 and bits(a) * abs(e) > max_bits:
+            raise ExpressionError("Result too large")
+        r = Fraction(a) ** e if e < 0 else a ** e
+    else:
+        raise ExpressionError(f"Unknown operator: {op}")
+
+    if isinstance(r, Fraction) and r.denominator == 1:
+        r = r.numerator
+
+    if bits(r) > max_bits:
+        raise ExpressionError("Result too large")
+
+    return r
+
+def eval_postfix(postfix: Sequence[str], max_ops: int = MAX_OPS, max_bits: int = MAX_BITS) -> Number:
+    stack: List[Number] = []
+    ops = 0
+    for t in postfix:
+        if t in OPERATORS:
+            ops += 1
+            if ops > max_ops:
+                raise ExpressionError("Too many operations")
+            if len(stack) < 2:
+                raise ExpressionError("Missing operand")
+            b = stack.pop()
+            a = stack.pop()
+            stack.append(apply_op(t, a, b, max_bits))
+        else:
+            stack.append(parse_number(t))
+
+    if len(stack) != 1:
+        raise ExpressionError("Missing operator")
+
+    return stack[0]
+
+def evaluate(tokens: Sequence[str], max_ops: int = MAX_OPS, max_bits: int = MAX_BITS) -> Number:
+    return eval_postfix(to_postfix(tokens), max_ops, max_bits)
+
+def format_decimal(value: Number, places: int) -> Tuple[str, bool]:
+    """value as a decimal truncated (not rounded) to places, and whether
+    that is the exact value. 1/2 is "0.5" for any places > 0."""
+    if isinstance(value, int):
+        return (str(value), True)
+
+    num = abs(value.numerator)
+    den = value.denominator
+    whole, rem = divmod(num, den)
+
+    digits = []
+    for _ in range(places):
+        if rem == 0:
+            break
+        d, rem = divmod(rem * 10, den)
+        digits.append(str(d))
+
+    s = str(whole)
+    if len(digits) > 0:
+        s += "." + "".join(digits)
+
+    if value < 0 and s.strip("0.") != "":
+        s = "-" + s
+
+    return (s, rem == 0)
+
+def solve(tokens: Sequence[str], places: int) -> Answer:
+    value = evaluate(tokens)
+    text, exact = format_decimal(value, places)
+    return Answer(value, text, exact)
+
+# Generating expressions.
+#
+# The expression is built left to right, tracking the sum of the finished
+# terms, and the sign and value of the current term. For each position only
+# the operators which have a valid operand are candidates, and the operand is
+# drawn from the range of valid values, so a challenge never has to be
+# regenerated:
+#
+# - divisors are nonzero, and divide the term if exact_division is on,
+# - every intermediate result stays within result_digits_max digits,
+# - without negatives, operands and intermediate results are not negative,
+# - the denominators of non-exact division stay within den_bits_max(), so that
+#   every intermediate result is within the evaluation budget.
+
+GEN_OPERATIONS = ("+", "-", "*", "/")
+
+# Upper bound of the divisor search for exact division.
+DIVISOR_SEARCH_MAX = 10000
+
+# Limit of result_digits_max, and the limit when it is 0, so that generated
+# expressions stay within the evaluation budget. It is also below the 4300
+# digits which CPython converts with str() by default, see
+# sys.get_int_max_str_digits().
+MAX_DIGITS = 4000
+
+# Limit of the denominators of non-exact division in bits. The evaluation
+# budget would allow more, but the operations on the fractions get slow, and
+# expressions are generated on the UI thread.
+DEN_MAX_BITS = 4096
+
+# Inclusive integer intervals.
+Bands = List[Tuple[int, int]]
+
+def operand_range(digits_min: int, digits_max: int) -> Tuple[int, int]:
+    range_from = max(0, 10 ** max(0, digits_min - 1) - 1)
+    range_to = max(range_from, 10 ** max(0, digits_max) - 1)
+    return (range_from, range_to)
+
+def constrain(bands: Bands, a: Number, b: Number, lo: int, hi: int) -> Bands:
+    """The parts of bands where lo <= a*n + b <= hi."""
+    if a == 0:
+        if lo <= b <= hi:
+            return bands
+        return []
+    # (lo - b) / a and (hi - b) / a as p / q, without reducing them the way
+    # Fraction does, which is slow with long numbers.
+    q = b.denominator * a.numerator
+    p_lo = (lo * b.denominator - b.numerator) * a.denominator
+    p_hi = (hi * b.denominator - b.numerator) * a.denominator
+    if q < 0:
+        q, p_lo, p_hi = -q, -p_hi, -p_lo
+    n_lo = -(-p_lo // q)
+    n_hi = p_hi // q
+
+    res = []
+    for x, y in bands:
+        x = max(x, n_lo)
+        y = min(y, n_hi)
+        if x <= y:
+            res.append((x, y))
+    return res
+
+def pick_in(rng: random.Random, bands: Bands) -> int:
+    total = sum(y - x + 1 for x, y in bands)
+    k = rng.randrange(total)
+    for x, y in bands:
+        if k <= y - x:
+            return x + k
+        k -= y - x + 1
+    raise ValueError("Empty bands")
+
+# lcm(1, ..., DIVISOR_SEARCH_MAX), and the primes up to it in blocks with
+# their product, built on first use.
+_divisor_lcm = 0
+_divisor_blocks: List[Tuple[int, List[int]]] = []
+
+DIVISOR_BLOCK_SIZE = 32
+
+def _divisor_tables() -> Tuple[int, List[Tuple[int, List[int]]]]:
+    global _divisor_lcm
+    if _divisor_lcm == 0:
+        sieve = bytearray([1]) * (DIVISOR_SEARCH_MAX + 1)
+        primes = []
+        m = 1
+        for p in range(2, DIVISOR_SEARCH_MAX + 1):
+            if sieve[p]:
+                sieve[p * p::p] = bytes(len(range(p * p, DIVISOR_SEARCH_MAX + 1, p)))
+                primes.append(p)
+                q = p
+                while q * p <= DIVISOR_SEARCH_MAX:
+                    q *= p
+                m *= q
+        for i in range(0, len(primes), DIVISOR_BLOCK_SIZE):
+            block = primes[i:i + DIVISOR_BLOCK_SIZE]
+            _divisor_blocks.append((math.prod(block), block))
+        _divisor_lcm = m
+    return (_divisor_lcm, _divisor_blocks)
+
+def small_divisors(t: int, limit: int) -> List[int]:
+    """Sorted positive divisors of t up to min(limit, DIVISOR_SEARCH_MAX).
+
+    Instead of trial dividing t, which can have thousands of digits, t is
+    reduced to its gcd with the lcm of the numbers up to DIVISOR_SEARCH_MAX,
+    which has the same divisors in that range, and that is factored. Blocks
+    of primes without a common factor are skipped with one gcd."""
+    limit = min(limit, DIVISOR_SEARCH_MAX)
+    if t == 0 or limit < 1:
+        return []
+    lcm, blocks = _divisor_tables()
+    g = math.gcd(t, lcm)
+
+    factors: List[Tuple[int, int]] = []
+    for block_product, block in blocks:
+        if g == 1 or block[0] > limit:
+            break
+        if math.gcd(g, block_product) == 1:
+            continue
+        for p in block:
+            if g == 1 or p > limit:
+                break
+            k = 0
+            while g % p == 0:
+                g //= p
+                k += 1
+            if k > 0:
+                factors.append((p, k))
+
+    # Kept sorted, so that each factor stops at the first divisor over the
+    # limit.
+    divs = [1]
+    for p, k in factors:
+        more = []
+        for d in divs:
+            if d * p > limit:
+                break
+            for _ in range(k):
+                d *= p
+                if d > limit:
+                    break
+                more.append(d)
+        divs.extend(more)
+        divs.sort()
+    return divs
+
+def divisors_in(t: int, lo: int, hi: int) -> List[int]:
+    """Positive divisors of t in [lo, hi]: the ones up to DIVISOR_SEARCH_MAX,
+    and their cofactors."""
+    t = abs(t)
+    # The cofactor t // d is at most hi only for d above this.
+    cofactor_from = t // (max(0, hi) + 1)
+    res = []
+    for d in small_divisors(t, hi):
+        if d * d > t:
+            break
+        if lo <= d:
+            res.append(d)
+        if d > cofactor_from:
+            e = t // d
+            if e != d and lo <= e <= hi:
+                res.append(e)
+    return res
+
+class ExprState(NamedTuple):
+    # Sum of the finished terms.
+    total: Number
+    # Sign of the current term, from the '+' or '-' before it.
+    sign: int
+    term: Number
+
+    def value(self) -> Number:
+        return self.total + self.sign * self.term
+
+def next_state(s: ExprState, op: str, n: int) -> ExprState:
+    if op in ("+", "-"):
+        return ExprState(s.value(), 1 if op == "+" else -1, n)
+    elif op == "*":
+        return ExprState(s.total, s.sign, s.term * n)
+    else:
+        t = Fraction(s.term, n)
+        return ExprState(s.total, s.sign, t.numerator if t.denominator == 1 else t)
+
+def den_bits(x: Number) -> int:
+    if isinstance(x, int):
+        return 0
+    return x.denominator.bit_length()
+
+def den_bits_max(hi: int) -> int:
+    """The denominator budget of an expression with values within hi.
+
+    Every result is at most hi, so a result with a denominator of this many
+    bits has at most hi.bit_length() + 2 * den_bits_max(hi) bits, which is
+    within MAX_BITS."""
+    return max(0, min(DEN_MAX_BITS, (MAX_BITS - hi.bit_length()) // 2 - 1))
+
+def operand_bands(s: ExprState, op: str, bands: Bands, lo: int, hi: int, exact_division: bool) -> Bands:
+    """The operands for op which keep the results within [lo, hi], and
+    within the evaluation budget."""
+    if op in ("+", "-"):
+        sign = 1 if op == "+" else -1
+        return constrain(bands, sign, s.value(), lo, hi)
+
+    elif op == "*":
+        # Both the term and the expression value.
+        bands = constrain(bands, s.term, 0, -hi, hi)
+        return constrain(bands, s.sign * s.term, s.total, lo, hi)
+
+    else:
+        # Nonzero divisors.
+        bands = constrain(bands, 1, 0, 1, hi) + constrain(bands, 1, 0, -hi, -1)
+        if exact_division and s.term != 0:
+            if isinstance(s.term, Fraction):
+                return []
+            top = max((max(-x, y) for x, y in bands), default=0)
+            divs = divisors_in(s.term, 1, top)
+            divs += [-d for d in divs]
+            bands = [(d, d) for x, y in bands for d in divs if x <= d <= y]
+        else:
+            # The denominator of the next total is at most the product of the
+            # denominators and the divisor, keep its bits within the budget.
+            # Dividing by 1 doesn't add any.
+            room = den_bits_max(hi) - den_bits(s.total) - den_bits(s.term)
+            cap = max(1, (1 << max(0, room)) - 1)
+            bands = constrain(bands, 1, 0, -cap, cap)
+
+        # Dividing by a positive number moves the value towards the total, so
+        # it stays in range. A negative divisor flips the term, check the
+        # extremes.
+        res = []
+        for x, y in bands:
+            if x > 0 or all(lo <= next_state(s, op, n).value() <= hi for n in (x, y)):
+                res.append((x, y))
+        return res
+
+def generate_expression(d: "Settings", rng: random.Random) -> List[str]:
+    """Items of a new expression, e.g. ["12", "*", "3", "+", "4"].
+
+    There are d['level'] numbers, and at level 1 the expression is "n op 1"."""
+    ops = [o for o in d['operations'] if o in GEN_OPERATIONS]
+    if len(ops) == 0:
+        ops = ["+"]
+
+    digits_max = min(d['digits_max'], MAX_DIGITS)
+    range_from, range_to = operand_range(min(d['digits_min'], digits_max), digits_max)
+
+    # The limit can't be lower than a single number.
+    digits = d['result_digits_max']
+    if digits <= 0:
+        digits = MAX_DIGITS
+    digits = min(max(digits, digits_max), MAX_DIGITS)
+    hi = 10 ** digits - 1
+    lo = -hi if d['negatives'] else 0
+
+    bands: Bands = [(range_from, range_to)]
+    if d['negatives'] and range_to > 0:
+        bands.append((-range_to, -max(range_from, 1)))
+
+    n = pick_in(rng, bands)
+    items = [str(n)]
+    s = ExprState(0, 1, n)
+
+    level = max(1, d['level'])
+    if level == 1:
+        bands = [(1, 1)]
+
+    for _ in range(max(1, level - 1)):
+        feasible: Dict[str, Bands] = dict()
+        for op in set(ops):
+            b = operand_bands(s, op, bands, lo, hi, d['exact_division'])
+            if len(b) > 0:
+                feasible[op] = b
+
+        # Choosing from ops keeps the weights of repeated operations.
+        choices = [o for o in ops if o in feasible]
+        if len(choices) == 0:
+            # E.g. only '+' and the value is at the limit. Finish the
+            # expression early, but it must have an operator.
+            if len(items) > 1:
+                break
+            op = ops[0]
+            if op in ("*", "/"):
+                n = 1
+            elif op == "+":
+                n = max(0, min(range_from, hi - s.value()))
+            else:
+                n = max(0, min(range_from, s.value() - lo))
+        else:
+            op = rng.choice(choices)
+            n = pick_in(rng, feasible[op])
+
+        items.append(op)
+        items.append(str(n))
+        s = next_state(s, op, n)
+
+    return items
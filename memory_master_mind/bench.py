@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+
+# Benchmark suite, run with `mmm bench`.
+#
+# Times the challenge generators, the rich formatting of challenges and
+# answers, answer checking on long inputs, loading synthetic quotes corpora
+# and the settings round-trips through the db. The widgets are used without an
+# app, the way the views call them.
+#
+# MMM_DIR must point to a scratch directory before the first import of db or
+# store, the runner takes care of it, so that the user's settings, caches and
+# indexes are not touched.
+#
+# Each benchmark is calibrated to run for at least MIN_TIME_S per repeat, and
+# the fastest repeat is kept, like timeit. The results are compared against a
+# saved report, and a benchmark regresses when it is slower than the baseline
+# by more than its threshold in REGRESSION_THRESHOLDS.
+
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple, TypedDict
+
+BENCH_LEVELS = [1, 5, 20]
+
+QUOTE_CORPUS_SIZES = [10_000, 100_000, 1_000_000]
+
+MIN_TIME_S = 0.05
+
+# Default threshold by name prefix, the longest matching prefix applies.
+# File and db benchmarks depend on the disk, and are noisier.
+REGRESSION_THRESHOLDS: Dict[str, float] = {
+    "": 0.25,
+    "init_quotes/": 0.5,
+    "db/": 0.5,
+}
+
+# Words of the synthetic quotes, without quote characters or commas.
+VOCABULARY = ("the of and to a in that is was he for it with as his on be at by "
+              "had not are but from or have an they which one you were her all "
+              "she there would their we him been has when who will more no if "
+              "out so said what up its about into than them can only other new "
+              "some could time these two may then do first any my now such like "
+              "our over man me even most made after also did many before must "
+              "through back years where much your way well down should because "
+              "each just those people how too little state good very make world "
+              "still own see men work long get here between both life being under "
+              "never day same another know while last might us great old year off "
+              "come since against go came right used take three").split()
+
+class BenchResult(TypedDict):
+    name: str
+    # Calls per repeat, and repeats.
+    number: int
+    repeat: int
+    # Per call, the fastest and the median repeat.
+    best_us: float
+    median_us: float
+
+class Regression(TypedDict):
+    name: str
+    baseline_us: float
+    current_us: float
+    ratio: float
+    threshold: float
+
+class BenchReport(TypedDict):
+    python: str
+    platform: str
+    seed: int
+    results: List[BenchResult]
+    # Filled in when compared against a baseline.
+    regressions: List[Regression]
+    ok: bool
+
+def timeit(name: str,
+           fn: Callable[[], object],
+           repeat: int,
+           number: Optional[int] = None,
+           setup: Optional[Callable[[], object]] = None) -> BenchResult:
+    """Times fn() number times per repeat. setup() runs before each repeat,
+    outside the timing. Without a number, it is calibrated to MIN_TIME_S."""
+    if number is None:
+        number = 1
+        while True:
+            if setup is not None:
+                setup()
+            t = time.perf_counter()
+            for _ in range(number):
+                fn()
+            dt = time.perf_counter() - t
+            if dt >= MIN_TIME_S or number >= 1_000_000:
+                break
+            number *= 2 if dt > MIN_TIME_S / 4 else 10
+
+    times: List[float] = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        t = time.perf_counter_ns()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter_ns() - t) / number / 1000)
+
+    times.sort()
+    return BenchResult(
+        name = name,
+        number = number,
+        repeat = repeat,
+        best_us = times[0],
+        median_us = times[len(times) // 2],
+    )
+
+def write_synthetic_quotes(path: Path, n: int, rng: random.Random):
+    """A quotes CSV like assets/quotes.csv, with n quotes of 3 to 60 words,
+    some with more lines and the author in parens."""
+    with open(path, "w", encoding="utf8", newline="\n") as f:
+        for i in range(n):
+            words = rng.choices(VOCABULARY, k=rng.randint(3, 60))
+            if len(words) > 20 and rng.random() < 0.3:
+                mid = len(words) // 2
+                body = " ".join(words[:mid]) + "\n" + " ".join(words[mid:])
+            else:
+                body = " ".join(words)
+            body = body[0].upper() + body[1:] + "."
+            if i % 4 == 0:
+                f.write(f'"{body} (Author {i % 997})"\n')
+            else:
+                f.write(f'"{body}\n\nAuthor {i % 997}"\n')
+
+def bench_challenges(repeat: int, seed: int, levels: List[int]) -> List[BenchResult]:
+    import memory_master_mind.components.quotes as quotes
+    from memory_master_mind.components.math_arithmetic import ShowNumbers as MathShow
+    from memory_master_mind.components.quotes import ShowQuote
+    from memory_master_mind.components.static_number_sequence import ShowNumbers as StaticShow
+    from memory_master_mind.components.timed_number_sequence import ShowNumbers as TimedShow
+    from memory_master_mind.types import MathArithId, QuotesId, StaticNumId, TimedNumId, load_settings, save_settings
+
+    quotes.init_quotes()
+
+    shows = [
+        ("static", StaticShow(StaticNumId)),
+        ("timed", TimedShow(TimedNumId)),
+        ("math", MathShow(MathArithId)),
+        ("quotes", ShowQuote(QuotesId)),
+    ]
+
+    results: List[BenchResult] = []
+    for level in levels:
+        for (name, show) in shows:
+            d = load_settings(show.view_id)
+            d['level'] = level
+            save_settings(show.view_id, d)
+            show.set_seed(seed)
+
+            if name == "quotes":
+                # ShowQuote.new_challenge() also saves the quote index with a
+                # journal write, time the generator only.
+                show.challenge.corpus = quotes.QUOTES
+                fn: Callable[[], object] = lambda: show.challenge.new(load_settings(show.view_id))
+            else:
+                fn = show.new_challenge
+            results.append(timeit(f"new_challenge/{name}/level-{level}", fn, repeat))
+
+            # One challenge, formatted while it is shown and with the answer.
+            show.set_seed(seed)
+            show.new_challenge()
+            show.show_numbers = True
+            results.append(timeit(f"format_challenge_rich/{name}/level-{level}", show.format_challenge_rich, repeat))
+            results.append(timeit(f"format_answer_rich/{name}/level-{level}", show.format_answer_rich, repeat))
+
+    return results
+
+def bench_check_answer(repeat: int, seed: int) -> List[BenchResult]:
+    from memory_master_mind.components.input_answer import InputAnswer
+
+    rng = random.Random(seed)
+    results: List[BenchResult] = []
+
+    for n in [100, 1000, 10_000]:
+        numbers = " ".join(str(rng.randint(0, 99999)) for _ in range(n))
+        words = " ".join(rng.choices(VOCABULARY, k=n))
+        # Typed with other caps, punctuation and line breaks.
+        typed = words.title().replace(" ", ",\n", n // 10)
+
+        for (name, correct, content) in [("numbers", numbers, numbers), ("text", words, typed)]:
+            input_answer = InputAnswer("")
+            input_answer.only_numbers = (name == "numbers")
+            input_answer.content = content
+            input_answer.set_answer(correct)
+            results.append(timeit(f"check_answer/{name}/{n}-words",
+                                  lambda: input_answer.check_answer(correct),
+                                  repeat))
+
+    return results
+
+def bench_init_quotes(repeat: int, seed: int, sizes: List[int], data_dir: Path) -> List[BenchResult]:
+    import memory_master_mind.components.quotes as quotes
+    import memory_master_mind.quote_cache as quote_cache
+    import memory_master_mind.quote_index as quote_index
+    from memory_master_mind.types import QuotesId, load_settings, save_settings
+
+    rng = random.Random(seed)
+    d = load_settings(QuotesId)
+    quotes_path = d['quotes_path']
+    results: List[BenchResult] = []
+
+    for n in sizes:
+        source = data_dir.joinpath(f"bench-quotes-{n}.csv")
+        write_synthetic_quotes(source, n, rng)
+
+        d['quotes_path'] = str(source)
+        save_settings(QuotesId, d)
+
+        def remove_cache():
+            quote_cache.cache_path_for(source).unlink(missing_ok=True)
+            quote_index.index_path_for(source).unlink(missing_ok=True)
+
+        def load():
+            quotes.init_quotes(reload=True)
+
+        # Parsing and writing the cache or index is the slow part, a few
+        # repeats are enough.
+        results.append(timeit(f"init_quotes/{n}/cold", load, min(repeat, 3), number=1, setup=remove_cache))
+        results.append(timeit(f"init_quotes/{n}/warm", load, repeat, number=1))
+
+        remove_cache()
+        source.unlink()
+
+    d['quotes_path'] = quotes_path
+    save_settings(QuotesId, d)
+    quotes.init_quotes(reload=True)
+
+    return results
+
+def bench_db(repeat: int) -> List[BenchResult]:
+    import memory_master_mind.db as db
+    from memory_master_mind.types import StaticNumId, default_settings
+
+    settings_json = json.dumps(default_settings(StaticNumId))
+    challenge = "bench"
+
+    def round_trip():
+        db.save_settings(challenge, settings_json)
+        json.loads(db.get_settings(challenge)[2])
+
+    db.save_settings(challenge, settings_json)
+    results = [
+        timeit("db/save_settings", lambda: db.save_settings(challenge, settings_json), repeat),
+        timeit("db/get_settings", lambda: db.get_settings(challenge), repeat),
+        timeit("db/round_trip", round_trip, repeat),
+    ]
+    return results
+
+def run(data_dir: Path,
+        repeat: int = 5,
+        seed: int = 0,
+        levels: List[int] = BENCH_LEVELS,
+        corpus_sizes: List[int] = QUOTE_CORPUS_SIZES,
+        only: Optional[str] = None,
+        progress: Optional[Callable[[str], None]] = None) -> BenchReport:
+    """Runs the benchmarks whose name starts with only, or all of them."""
+    import memory_master_mind.db as db
+    import memory_master_mind.store as store
+
+    db.db_init()
+
+    # The name prefixes of each group, and the group.
+    groups: List[Tuple[Tuple[str, ...], Callable[[], List[BenchResult]]]] = [
+        (("new_challenge/", "format_challenge_rich/", "format_answer_rich/"),
+         lambda: bench_challenges(repeat, seed, levels)),
+        (("check_answer/",), lambda: bench_check_answer(repeat, seed)),
+        (("init_quotes/",), lambda: bench_init_quotes(repeat, seed, corpus_sizes, data_dir)),
+        (("db/",), lambda: bench_db(repeat)),
+    ]
+
+    results: List[BenchResult] = []
+    for (prefixes, group) in groups:
+        if only is not None and not any(p.startswith(only) or only.startswith(p) for p in prefixes):
+            continue
+        for r in group():
+            if only is not None and not r['name'].startswith(only):
+                continue
+            results.append(r)
+            if progress is not None:
+                progress(format_result(r))
+
+    store.flush(wait=True)
+    db.close_connections()
+
+    return BenchReport(
+        python = platform.python_version(),
+        platform = sys.platform,
+        seed = seed,
+        results = results,
+        regressions = [],
+        ok = True,
+    )
+
+def threshold_for(name: str) -> float:
+    prefix = max((p for p in REGRESSION_THRESHOLDS if name.startswith(p)), key=len)
+    return REGRESSION_THRESHOLDS[prefix]
+
+def compare(report: BenchReport,
+            baseline: BenchReport,
+            threshold: Optional[float] = None) -> BenchReport:
+    """Marks the results slower than the baseline by more than the threshold,
+    by default the one in REGRESSION_THRESHOLDS."""
+    base = {r['name']: r for r in baseline['results']}
+    regressions: List[Regression] = []
+    for r in report['results']:
+        b = base.get(r['name'])
+        if b is None or b['best_us'] <= 0:
+            continue
+        limit = threshold_for(r['name']) if threshold is None else threshold
+        ratio = r['best_us'] / b['best_us']
+        if ratio > 1 + limit:
+            regressions.append(Regression(
+                name = r['name'],
+                baseline_us = b['best_us'],
+                current_us = r['best_us'],
+                ratio = ratio,
+                threshold = limit,
+            ))
+
+    report['regressions'] = regressions
+    report['ok'] = (len(regressions) == 0)
+    return report
+
+def load_report(path: Path) -> BenchReport:
+    with open(path, "r", encoding="utf8") as f:
+        return json.load(f)
+
+def save_report(path: Path, report: BenchReport):
+    with open(path, "w", encoding="utf8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+def format_result(r: BenchResult) -> str:
+    return f"{r['best_us']:12.1f} us  {r['median_us']:12.1f} us  {r['name']}"
@@ -1,18 +1,16 @@
 #!/usr/bin/env python3
 
-import json
-
 from textual import events
 from textual.views._grid_view import GridView
 
+from memory_master_mind.engine import LevelState
 from memory_master_mind.components.challenge_timer import ChallengeTimer
 from memory_master_mind.components.footer import Footer
 from memory_master_mind.components.input_answer import InputAnswer
 from memory_master_mind.components.preferences_interface import PreferencesInterface
 from memory_master_mind.components.show_challenge_interface import ShowChallengeInterface
 
-import memory_master_mind.db as db
-from memory_master_mind.types import QuotesId, Settings, State, load_settings
+from memory_master_mind.types import QuotesId, Settings, State, load_settings, save_settings
 from memory_master_mind.components.header import Header
 
 
@@ -26,12 +24,12 @@ class ChallengeInterface(GridView):
     header: Header
     footer: Footer
     preferences_view: PreferencesInterface
-    current_level: int
-    ch_per_current_level: int
-    first_try: bool
+    levels: LevelState
     show_challenge_blocks_keys: bool = False
     is_text_challenge: bool = False
     help_md_filename: str
+    # The view is built once and docked again, on_mount() only runs the first time.
+    has_mounted: bool = False
 
     def init_attr(self):
         """Assign self.view_id and self.help_md_filename"""
@@ -46,9 +44,7 @@ class ChallengeInterface(GridView):
         self.init_attr()
 
         d = load_settings(self.view_id)
-        self.current_level = d["level"]
-        self.ch_per_current_level = 0
-        self.first_try = True
+        self.levels = LevelState(d["level"], d["level_max"], d["ch_per_level"])
 
         self.challenge_timer = ChallengeTimer()
 
@@ -57,8 +53,22 @@ class ChallengeInterface(GridView):
     def get_instruction(self) -> str:
         raise NotImplementedError
 
-    def get_preferences_view(self):
-        raise NotImplementedError
+    @property
+    def first_try(self) -> bool:
+        return self.levels.first_try
+
+    @property
+    def ch_per_current_level(self) -> int:
+        return self.levels.ch_per_current_level
+
+    def get_preferences_view(self) -> PreferencesInterface:
+        return self.preferences_view
+
+    async def resume(self):
+        """Starts a new challenge when the view is docked again."""
+        self.levels.reset()
+        self.new_challenge()
+        await self.focus_input()
 
     async def focus_input(self):
         await self.input_answer.focus()
@@ -68,26 +78,18 @@ class ChallengeInterface(GridView):
         self.show_numbers.state = value
         self.input_answer.state = value
 
-    def incr_level(self):
+    def save_level(self):
         d = load_settings(self.view_id)
-        if self.first_try:
-            self.ch_per_current_level += 1
-            lvl = self.current_level + 1
-            if lvl <= d['level_max'] and self.ch_per_current_level >= d['ch_per_level']:
-                self.ch_per_current_level = 0
-                d['level'] = lvl
-        else:
-            self.ch_per_current_level = 0
-            d['level'] = self.current_level
-        db.save_settings(self.view_id, json.dumps(d))
+        d['level'] = self.levels.next_level
+        save_settings(self.view_id, d, defer=True)
+
+    def incr_level(self):
+        self.levels.correct()
+        self.save_level()
 
     def decr_level(self):
-        if self.current_level <= 1:
-            return
-        self.ch_per_current_level = 0
-        d = load_settings(self.view_id)
-        d['level'] = self.current_level - 1
-        db.save_settings(self.view_id, json.dumps(d))
+        self.levels.lower()
+        self.save_level()
 
     def do_started_answer(self):
         if self.is_text_challenge:
@@ -96,10 +98,10 @@ class ChallengeInterface(GridView):
         self.footer.show_answer = True
         self.upd_state(State.STARTED_ANSWER)
 
-    def start_timer(self, seconds_per_level: int):
+    def start_timer(self, seconds_per_level: float):
         self.challenge_timer.stop_timer()
-        if seconds_per_level != 0:
-            secs = seconds_per_level * self.current_level
+        if seconds_per_level > 0:
+            secs = seconds_per_level * self.levels.level
             self.challenge_timer.start_timer(
                 secs=secs,
                 final_cb=self.do_started_answer,
@@ -107,14 +109,12 @@ class ChallengeInterface(GridView):
 
     def new_challenge(self, regenerate: bool = True):
         d = load_settings(self.view_id)
-        self.current_level = d["level"]
+        self.levels.start(d['level'], d['level_max'], d['ch_per_level'])
 
-        self.footer.level = self.current_level
+        self.footer.level = self.levels.level
         self.footer.ch_per_level = d["ch_per_level"]
         self.footer.ch_per_current_level = self.ch_per_current_level + 1
 
-        self.first_try = True
-
         if self.view_id != QuotesId:
             self.start_timer(d['seconds_per_level'])
 
@@ -126,6 +126,7 @@ class ChallengeInterface(GridView):
             self.show_numbers.show_numbers = True
 
         self.input_answer.new_challenge()
+        self.input_answer.set_answer(self.show_numbers.format_answer_plain())
 
         if self.view_id == QuotesId:
             self.footer.show_answer = True
@@ -151,6 +152,10 @@ class ChallengeInterface(GridView):
         if event.key == "escape":
             return
 
+        if event.key in ["pageup", "pagedown"]:
+            self.show_numbers.page_by(-1 if event.key == "pageup" else 1)
+            return
+
         if event.key == "ctrl+i":
             if not self.input_answer.only_numbers:
                 self.toggle_menu()
@@ -204,8 +209,8 @@ class ChallengeInterface(GridView):
                     self.app.save_stats() # type: ignore
 
                 if self.state == State.WRONG:
-                    self.decr_level()
-                    self.first_try = False
+                    self.levels.wrong()
+                    self.save_level()
                     if not self.input_answer.only_numbers:
                         self.set_menu_enabled(False)
 
@@ -235,4 +240,5 @@ class ChallengeInterface(GridView):
         self.grid.add_widget(self.input_answer, area="answer")
         self.grid.add_widget(self.footer, area="footer")
 
+        self.has_mounted = True
         self.new_challenge()
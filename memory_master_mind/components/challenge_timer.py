@@ -1,6 +1,19 @@
 #!/usr/bin/env python3
 
-from typing import Callable, Optional
+# Countdown of a challenge.
+#
+# The run has absolute deadlines on time.monotonic(): the end, the optional
+# ticks every tick_interval seconds from the start, and the whole seconds of
+# the countdown shown in the widget. Each timer is set for the time remaining
+# until the next deadline, so late timers don't add up, and a tick which was
+# missed under load is still called, late, instead of being dropped.
+#
+# How late each timer fired is recorded, see metrics().
+
+import math
+import time
+from array import array
+from typing import Callable, Optional, TypedDict
 
 from rich.align import Align
 from rich.text import Text
@@ -9,56 +22,124 @@ from textual import events
 from textual.reactive import Reactive
 from textual.widget import Widget
 
+# Deadlines closer than this are due now.
+EPSILON = 0.001
+
+class TimerMetrics(TypedDict):
+    ticks: int
+    avg_jitter_ms: float
+    max_jitter_ms: float
+
 class ChallengeTimer(Widget):
     seconds_remain = Reactive(0)
     timer_count: int = 0
     current_timer_name: Optional[str] = None
-    tick_cb: Optional[Callable] = None
+    tick_cb: Optional[Callable[[int], None]] = None
     final_cb: Optional[Callable] = None
+    start_time: float = 0.0
+    end_time: float = 0.0
+    tick_interval: float = 1.0
+    ticks_done: int = 0
+    # Deadline of the timer which is set.
+    deadline: float = 0.0
+    # Seconds each timer of the current run fired after its deadline.
+    jitter: array
 
     def __init__(self):
         super().__init__()
-        def noop():
-            pass
-        self.timers = dict()
-        self.timer_count += 1
-        k = str(self.timer_count)
-        self.current_timer_name = k
-        self.set_timer(1, noop, name="x")
+        self.jitter = array('d')
+
+    def ticks_total(self) -> int:
+        """Number of ticks before the end."""
+        if self.tick_cb is None:
+            return 0
+        return max(0, math.ceil((self.end_time - self.start_time) / self.tick_interval - EPSILON) - 1)
+
+    def tick_deadline(self, k: int) -> float:
+        return self.start_time + k * self.tick_interval
+
+    def next_deadline(self, now: float) -> float:
+        # The countdown shows the whole seconds remaining, rounded up.
+        remain = self.end_time - now
+        deadline = self.end_time - (math.ceil(remain - EPSILON) - 1)
+
+        if self.ticks_done < self.ticks_total():
+            deadline = min(deadline, self.tick_deadline(self.ticks_done + 1))
+
+        return min(deadline, self.end_time)
+
+    def schedule(self):
+        now = time.monotonic()
+        self.deadline = self.next_deadline(now)
+        self.set_timer(delay=max(0.0, self.deadline - now), name=self.current_timer_name)
 
     async def on_timer(self, event: events.Timer) -> None:
         if self.current_timer_name is None:
             return
 
         k = self.current_timer_name
-        if event.timer.name == k:
+        if event.timer.name != k:
+            return
+
+        now = time.monotonic()
+        self.jitter.append(now - self.deadline)
+
+        while self.ticks_done < self.ticks_total() \
+              and self.tick_deadline(self.ticks_done + 1) <= now + EPSILON:
+            self.ticks_done += 1
             if self.tick_cb is not None:
-                self.tick_cb()
+                self.tick_cb(self.ticks_done)
+            # The callback may have stopped or restarted the timer.
+            if self.current_timer_name != k:
+                return
 
-            if self.seconds_remain - 1 <= 0:
-                self.seconds_remain = 0
-                if self.final_cb is not None:
-                    self.final_cb()
-            else:
-                self.seconds_remain -= 1
-                self.set_timer(delay=1, name=k)
+        if now + EPSILON >= self.end_time:
+            self.seconds_remain = 0
+            self.current_timer_name = None
+            self.log("Challenge timer:", self.metrics())
+            if self.final_cb is not None:
+                self.final_cb()
+            return
+
+        self.seconds_remain = math.ceil(self.end_time - now - EPSILON)
+        self.schedule()
 
     def start_timer(self,
-                    secs: int,
+                    secs: float,
                     final_cb: Callable,
-                    tick_cb: Optional[Callable] = None):
+                    tick_cb: Optional[Callable[[int], None]] = None,
+                    tick_interval: float = 1.0):
+        """Calls final_cb after secs, and tick_cb(k) at k * tick_interval
+        seconds for each k before that."""
         self.timer_count += 1
-        k = str(self.timer_count)
-        self.current_timer_name = k
-        self.set_timer(delay=1, name=k)
-        self.seconds_remain = secs
+        self.current_timer_name = str(self.timer_count)
+        self.start_time = time.monotonic()
+        self.end_time = self.start_time + secs
+        self.tick_interval = tick_interval
+        self.ticks_done = 0
         self.final_cb = final_cb
         self.tick_cb = tick_cb
+        self.jitter = array('d')
+        self.seconds_remain = math.ceil(secs)
+        self.schedule()
 
     def stop_timer(self):
         self.seconds_remain = 0
         self.current_timer_name = None
 
+    def metrics(self) -> TimerMetrics:
+        if len(self.jitter) > 0:
+            avg = sum(self.jitter) / len(self.jitter)
+            max_jitter = max(self.jitter)
+        else:
+            avg = 0.0
+            max_jitter = 0.0
+        return TimerMetrics(
+            ticks = self.ticks_done,
+            avg_jitter_ms = avg * 1000,
+            max_jitter_ms = max_jitter * 1000,
+        )
+
     def render(self):
         if self.seconds_remain > 0:
             text = f"{self.seconds_remain}s "
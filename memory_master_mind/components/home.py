@@ -1,8 +1,6 @@
 #!/usr/bin/env python3
 
-import json
-
-from typing import List, Optional
+from typing import Any, List, Mapping, Optional
 
 from textual import events
 from textual.widgets import ButtonPressed
@@ -12,8 +10,7 @@ from memory_master_mind.components.form_label import FormLabel
 from memory_master_mind.components.input_text import InputText
 from memory_master_mind.components.preferences_interface import PreferencesInterface
 
-import memory_master_mind.db as db
-from memory_master_mind.types import app_load_settings
+from memory_master_mind.types import app_load_settings, app_save_settings
 from memory_master_mind.types import AppId, HomeId, StaticNumId, TimedNumId, MathArithId, QuotesId
 from memory_master_mind.components.header import Header
 from memory_master_mind.components.form_button import FormButton
@@ -35,7 +32,10 @@ class PreferencesView(PreferencesInterface):
         else:
             d['stats_include_settings'] = False
 
-        db.save_settings(AppId, json.dumps(d))
+        app_save_settings(d)
+
+    def load_input_settings(self) -> Mapping[str, Any]:
+        return app_load_settings()
 
     def setup_labels_inputs(self):
         d = app_load_settings()
@@ -72,14 +72,15 @@ class PreferencesView(PreferencesInterface):
 
 class HomeView(GridView):
     view_id: str
-    preferences_view: PreferencesInterface
-    challenges: List[FormButton] = []
+    preferences_view: Optional[PreferencesInterface] = None
+    challenges: List[FormButton]
     selected_idx: Optional[int] = None
 
     def __init__(self):
         super().__init__()
         self.view_id = HomeId
         self.header = Header(title="Memory Master Mind")
+        self.challenges = []
 
     def highlight_selected(self):
         if self.selected_idx is not None:
@@ -169,6 +170,7 @@ class HomeView(GridView):
         self.grid.add_row("footer", size=1)
         self.grid.add_widget(self.footer)
 
-    def get_preferences_view(self):
-        self.preferences_view = PreferencesView(AppId)
+    def get_preferences_view(self) -> PreferencesInterface:
+        if self.preferences_view is None:
+            self.preferences_view = PreferencesView(AppId)
         return self.preferences_view
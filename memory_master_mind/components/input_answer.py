@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 
 import re
-import time
 from typing import List
 
 from rich.align import Align
@@ -14,28 +13,50 @@ from textual import events
 from textual.reactive import Reactive
 from textual.widget import Widget
 
-from memory_master_mind.types import RE_PUNCT, State
+from memory_master_mind.engine import AnswerChecker
+from memory_master_mind.keystrokes import NO_ITEM, KeyLog, KeystrokeMetrics
+from memory_master_mind.text_buffer import MOVE_KEYS, TextBuffer
+from memory_master_mind.types import State
 
 class InputAnswer(Widget):
-    content = Reactive("")
     state = Reactive(State.SHOW_CHALLENGE)
     instruction: str
     only_numbers: bool = True
-    time_challenge_started: float = 0.0
     time_elapsed: float = 0.0
     show_challenge_blocks_keys: bool = False
+    key_log: KeyLog
+    buffer: TextBuffer
+    checker: AnswerChecker
 
     def __init__(self, instruction: str):
         super().__init__()
         self.instruction = instruction
+        self.key_log = KeyLog()
+        self.buffer = TextBuffer()
+        self.checker = AnswerChecker()
+
+    @property
+    def content(self) -> str:
+        return self.buffer.text()
+
+    @content.setter
+    def content(self, text: str):
+        self.buffer.set_text(text)
+        self.refresh()
 
     def new_challenge(self):
         self.content = ""
-        self.time_challenge_started = time.time()
+        self.key_log.start()
+
+    def set_answer(self, correct_answer: str):
+        """Normalizes the correct answer once per challenge."""
+        self.checker.set_answer(correct_answer)
 
     def end_challenge(self):
-        t = time.time()
-        self.time_elapsed = t - self.time_challenge_started
+        self.time_elapsed = self.key_log.elapsed_ns() / 1e9
+
+    def key_metrics(self) -> KeystrokeMetrics:
+        return self.key_log.metrics()
 
     def on_key(self, event: events.Key) -> None:
         if self.state == State.CORRECT:
@@ -54,28 +75,33 @@ class InputAnswer(Widget):
         if self.state is State.SHOW_CHALLENGE and self.show_challenge_blocks_keys:
             return
 
-        if event.key == "ctrl+h":
-            # ctrl+h is Backspace
-            self.content = self.content[:-1]
+        # The buffer is edited in place, and refresh() repaints once when the
+        # queued keys are processed, e.g. after a paste.
+        if self.buffer.edit_key(event.key):
+            if event.key not in MOVE_KEYS:
+                self.key_log.record(NO_ITEM)
         elif self.only_numbers:
-            if re.search(r'[0-9\. -]', event.key):
-                    self.content += event.key
+            if len(event.key) == 1 and re.search(r'[0-9\. -]', event.key):
+                self.buffer.insert(event.key)
+                self.key_log.record(self.buffer.current_word())
+            else:
+                return
         else:
             if event.key == "enter":
-                self.content += "\n"
+                self.buffer.insert("\n")
+            elif len(event.key) == 1:
+                self.buffer.insert(event.key)
             else:
-                self.content += event.key
+                return
+            self.key_log.record(self.buffer.current_word())
 
-    def check_answer(self, correct_answer: str) -> State:
-        text = self.content.strip().lower()
-        text = re.sub(RE_PUNCT, '', text)
-        text = re.sub(r'  +', ' ', text)
+        self.refresh()
 
-        answer = correct_answer.strip().lower()
-        answer = re.sub(RE_PUNCT, '', answer)
-        answer = re.sub(r'  +', ' ', answer)
+    def check_answer(self, correct_answer: str) -> State:
+        if correct_answer != self.checker.answer:
+            self.set_answer(correct_answer)
 
-        if text == answer:
+        if self.checker.check(self.content):
             self.state = State.CORRECT
         else:
             self.state = State.WRONG
@@ -83,8 +109,17 @@ class InputAnswer(Widget):
         return self.state
 
     def render(self) -> RenderableType:
-        s = self.content + "_"
-        renderable = Align.left(Text(s, style="bold"))
+        before, after = self.buffer.split_at_cursor()
+        s = Text(before, style="bold")
+        if after == "":
+            s.append("_")
+        elif after[0] == "\n":
+            s.append(" ", style="reverse")
+            s.append(after)
+        else:
+            s.append(after[0], style="reverse")
+            s.append(after[1:])
+        renderable = Align.left(s)
 
         title = self.instruction
 
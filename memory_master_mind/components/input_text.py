@@ -13,14 +13,16 @@ from textual import events
 from textual.reactive import Reactive
 from textual.widget import Widget
 
+from memory_master_mind.text_buffer import TextBuffer
+
 class InputText(Widget):
     label = Reactive("")
-    content = Reactive("")
     is_selected = Reactive(False)
     is_bool = False
     is_text = False
     allow_regex: Optional[str] = None
     input_height: int
+    buffer: TextBuffer
 
     def __init__(self,
                  label: str,
@@ -31,12 +33,21 @@ class InputText(Widget):
                  input_height: int = 3):
         super().__init__()
         self.label = label
-        self.content = content
+        self.buffer = TextBuffer(content)
         self.is_bool = is_bool
         self.is_text = is_text
         self.allow_regex = allow_regex
         self.input_height = input_height
 
+    @property
+    def content(self) -> str:
+        return self.buffer.text()
+
+    @content.setter
+    def content(self, text: str):
+        self.buffer.set_text(text)
+        self.refresh()
+
     async def set_selected(self, x: bool):
         self.is_selected = x
         if x:
@@ -62,29 +73,34 @@ class InputText(Widget):
                 self.content = "True"
             return
 
-        if event.key == "ctrl+h":
-            self.content = self.content[:-1]
+        if self.buffer.edit_key(event.key):
+            self.refresh()
             return
 
-        if self.allow_regex:
-            if re.search(self.allow_regex, event.key):
-                self.content += event.key
-        else:
-            self.content += event.key
+        if len(event.key) != 1:
+            return
+
+        if self.allow_regex is None or re.search(self.allow_regex, event.key):
+            self.buffer.insert(event.key)
+            self.refresh()
 
     def render(self) -> RenderableType:
 
         if self.is_selected:
-            text = "> " + self.content
+            before, after = self.buffer.split_at_cursor()
+            text = Text("> " + before)
+            if after != "":
+                text.append(after[0], style="reverse")
+                text.append(after[1:])
             border_style = "white"
             style = "white on rgb(0,57,0)"
         else:
-            text = "  " + self.content
+            text = Text("  " + self.content)
             border_style = "green"
             style = "white on rgb(50,57,50)"
 
         renderable = Align.left(
-            renderable=Text(text=text),
+            renderable=text,
             style=style,
         )
 
@@ -3,14 +3,11 @@
 # Math (Arithmetic)
 
 import re
-import math
-from random import randint
-import json
 
 from rich.text import Text
 
-from memory_master_mind.types import MathArithId, is_prime, load_settings
-import memory_master_mind.db as db
+from memory_master_mind.engine import Challenge, MathArithmetic
+from memory_master_mind.types import MathArithId, load_settings, parse_seconds, save_settings
 from memory_master_mind.components.footer import Footer
 from memory_master_mind.components.form_label import FormLabel
 from memory_master_mind.components.input_answer import InputAnswer
@@ -19,39 +16,10 @@ from memory_master_mind.components.preferences_interface import PreferencesInter
 from memory_master_mind.components.input_text import InputText
 
 class ShowNumbers(ShowChallengeInterface):
-    def new_challenge(self, regenerate: bool = True):
-        d = load_settings(self.view_id)
-        a = []
-        for _ in range(0, d['level']):
-            range_from = int(math.pow(10, d['digits_min']- 1)) - 1
-            range_to = int(math.pow(10, d['digits_max'])) - 1
-
-            n = randint(range_from, range_to)
-
-            if d['negatives']:
-                if randint(1, 100) % 2 == 1:
-                    n *= -1
-
-            a.append(str(n))
-
-            x = len(d['operations']) - 1
-            op = d['operations'][randint(0, x)]
-
-            a.append(op)
-
-        if d['level'] == 1:
-            a.append("1")
-        else:
-            a.pop()
+    challenge: MathArithmetic
 
-        self.items = a
-
-    def format_challenge_plain(self) -> str:
-        text = " ".join(self.items)
-        if not self.show_numbers:
-            text = re.sub('.', '-', text)
-
-        return text
+    def make_challenge(self) -> Challenge:
+        return MathArithmetic()
 
     def format_challenge_rich(self) -> Text:
         if self.show_numbers:
@@ -61,69 +29,46 @@ class ShowNumbers(ShowChallengeInterface):
                 if idx != 0:
                     text.append(" ")
 
-                if i.isdigit() and d['primes_are_red'] and is_prime(int(i)):
+                if d['primes_are_red'] and self.item_is_prime(idx):
                     text.append(i, style="red")
                 else:
                     text.append(i)
 
         else:
-            s = " ".join(self.items)
-            s = re.sub('.', '-', s)
-            text = Text(s)
+            text = Text(self.challenge.masked_text())
 
         return text
 
     def format_answer_plain(self) -> str:
-        d = load_settings(self.view_id)
-        answer = self.generate_answer()
-        answer = re.sub(r'\.0$', '', answer)
-
-        if answer.find('.') != -1:
-            digits = re.compile('(\\.[0-9]{1,' + str(d['solve_frac_dec']) + '}).*')
-            answer = re.sub(digits, '\\1', answer)
-
-        return answer
+        return self.generate_answer()
 
     def format_answer_rich(self) -> Text:
         d = load_settings(self.view_id)
         answer = self.generate_answer()
-        answer = re.sub(r'\.0$', '', answer)
 
         text = self.format_challenge_rich().append("\n= ")
 
-        if answer.find('.') != -1:
-            digits = re.compile('(\\.[0-9]{1,' + str(d['solve_frac_dec']) + '}).*')
-            s = re.sub(digits, '\\1', answer)
-            if len(s) < len(answer):
-                s = "~" + s
-            text.append(s)
+        solution = self.challenge.solution
+        if solution is not None and not solution.exact:
+            text.append("~" + answer)
 
-        elif answer.find('-') != -1:
-            if answer.isdigit() and d['primes_are_red'] and is_prime(int(answer)):
-                text.append(answer, style="red")
-            else:
-                text.append(answer)
+        elif d['primes_are_red'] and self.challenge.solution_is_prime:
+            text.append(answer, style="red")
         else:
             text.append(answer)
 
         return text
 
-    def generate_answer(self) -> str:
-        if len(self.items) > 0:
-            expr = " ".join(self.items)
-            answer = str(eval(expr, {'__builtins__':None}))
-            return answer
-        else:
-            return ""
-
 
 class PreferencesView(PreferencesInterface):
     def save_settings(self):
         d = load_settings(self.view_id)
 
-        for k in ['digits_min', 'digits_max', 'level_max', 'ch_per_level', 'seconds_per_level', 'solve_frac_dec']:
+        for k in ['digits_min', 'digits_max', 'level_max', 'ch_per_level', 'solve_frac_dec', 'result_digits_max']:
             d[k] = int(self.inputs[k].content)
 
+        d['seconds_per_level'] = parse_seconds(self.inputs['seconds_per_level'].content, d['seconds_per_level'])
+
         s = self.inputs['operations'].content
         s = re.sub(r'([^ ])', '\\1 ', s).strip()
         s = re.sub(r'  +', ' ', s)
@@ -141,7 +86,12 @@ class PreferencesView(PreferencesInterface):
         else:
             d['negatives'] = False
 
-        db.save_settings(self.view_id, json.dumps(d))
+        if self.inputs['exact_division'].content == "True":
+            d['exact_division'] = True
+        else:
+            d['exact_division'] = False
+
+        save_settings(self.view_id, d)
 
     def setup_labels_inputs(self):
         d = load_settings(self.view_id)
@@ -154,13 +104,19 @@ class PreferencesView(PreferencesInterface):
         self.labels['primes_are_red'] = FormLabel(label="Primes are red:")
         self.labels['operations'] = FormLabel(label="Operations (+ - / *):")
         self.labels['negatives'] = FormLabel(label="Negatives:")
+        self.labels['exact_division'] = FormLabel(label="Exact division:")
+        self.labels['result_digits_max'] = FormLabel(label="Result digits max (0 = any):")
         self.labels['solve_frac_dec'] = FormLabel(label="Solve fractions to decimals:")
 
         for k in ['digits_min', 'digits_max', 'level_max', 'ch_per_level', 'seconds_per_level']:
+            if k == 'seconds_per_level':
+                allow_regex = r'[0-9\.]'
+            else:
+                allow_regex = r'[0-9]'
             self.inputs[k] = InputText(
                 label=k,
                 content=str(d[k]),
-                allow_regex=r'[0-9]',
+                allow_regex=allow_regex,
                 input_height=1,
             )
 
@@ -185,6 +141,20 @@ class PreferencesView(PreferencesInterface):
             input_height=1,
         )
 
+        self.inputs['exact_division'] = InputText(
+            label='exact_division',
+            content=str(d['exact_division']),
+            is_bool=True,
+            input_height=1,
+        )
+
+        self.inputs['result_digits_max'] = InputText(
+            label='result_digits_max',
+            content=str(d['result_digits_max']),
+            allow_regex=r'[0-9]',
+            input_height=1,
+        )
+
         self.inputs['solve_frac_dec'] = InputText(
             label='solve_frac_dec',
             content=str(d['solve_frac_dec']),
@@ -207,14 +177,10 @@ class MathArithmeticView(ChallengeInterface):
         self.preferences_view = PreferencesView(self.view_id)
 
         self.footer = Footer()
-        self.footer.level = self.current_level
+        self.footer.level = self.levels.level
 
         self.show_numbers = ShowNumbers(self.view_id)
         self.input_answer = InputAnswer(self.get_instruction())
 
     def get_instruction(self) -> str:
         return "Calculate the expression, then type the result."
-
-    def get_preferences_view(self):
-        self.preferences_view = PreferencesView(self.view_id)
-        return self.preferences_view
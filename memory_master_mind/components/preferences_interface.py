@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 
-from typing import Dict, Optional
+from typing import Any, Dict, Mapping, Optional
 
 from textual import events
 from textual.views._grid_view import GridView
@@ -11,6 +11,7 @@ from memory_master_mind.components.footer import Footer
 from memory_master_mind.components.input_text import InputText
 from memory_master_mind.components.form_button import FormButton
 from memory_master_mind.components.form_label import FormLabel
+from memory_master_mind.types import load_settings
 
 
 class PreferencesInterface(GridView):
@@ -20,6 +21,8 @@ class PreferencesInterface(GridView):
     submit_btn: FormButton
     cancel_btn: FormButton
     selected_idx: Optional[int] = None
+    # The view is built once and docked again, on_mount() only runs the first time.
+    has_mounted: bool = False
 
     def __init__(self, view_id: str):
         super().__init__()
@@ -30,6 +33,25 @@ class PreferencesInterface(GridView):
     def save_settings(self):
         raise NotImplementedError
 
+    def load_input_settings(self) -> Mapping[str, Any]:
+        return load_settings(self.view_id)
+
+    async def reload_inputs(self):
+        """Shows the saved settings again, e.g. after Cancel."""
+        if not self.has_mounted:
+            return
+        d = self.load_input_settings()
+        for k, w in self.inputs.items():
+            v = d[k] # type: ignore
+            if isinstance(v, list):
+                w.content = " ".join(v)
+            else:
+                w.content = str(v)
+            w.is_selected = False
+        self.selected_idx = None
+        self.set_menu_enabled(True)
+        await self.header.focus()
+
     def set_menu_enabled(self, x: bool):
         self.app.menu_enabled = x # type: ignore
         self.footer.menu_enabled = x
@@ -139,3 +161,5 @@ class PreferencesInterface(GridView):
         self.footer.show_level = False
 
         self.grid.add_widget(self.footer, area="footer")
+
+        self.has_mounted = True
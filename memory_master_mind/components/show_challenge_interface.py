@@ -1,36 +1,85 @@
 #!/usr/bin/env python3
 
-from typing import List
+from typing import Optional, List, Tuple
 from rich.align import Align
+from rich.containers import Lines
 from rich.text import Text
 
 from textual.reactive import Reactive
 from textual.widget import Widget
 
-from memory_master_mind.types import State
+import memory_master_mind.store as store
+from memory_master_mind.engine import Challenge
+from memory_master_mind.primes import prime_flags
+from memory_master_mind.types import State, load_settings
+
+RenderKey = Tuple[State, bool, bool, int, int, int, int]
 
 class ShowChallengeInterface(Widget):
     state = Reactive(State.SHOW_CHALLENGE)
     view_id: str
+    # Generates the items and the answer, the widget shows them.
+    challenge: Challenge
     items = Reactive([])
     show_numbers = Reactive(True)
     current_item = Reactive(0)
+    # A presentation phase between items, nothing is shown but the items
+    # don't change.
+    blank = Reactive(False)
+    # Whether each item is a prime number, set together with the items, empty
+    # when primes are not shown.
+    prime_flags: List[bool] = []
+    # Incremented by set_items(), so that a new challenge with the same
+    # items still invalidates the render cache.
+    items_version: int = 0
+    render_key: Optional[RenderKey] = None
+    render_text: Optional[Text] = None
+    # render_text wrapped to a width, and the key and width it was wrapped for.
+    wrapped_for: Optional[Tuple[RenderKey, int]] = None
+    wrapped_lines: Optional[Lines] = None
+    # Shown page, when the text is taller than the widget.
+    page = Reactive(0)
+    page_count: int = 1
 
     def __init__(self, view_id: str):
         super().__init__()
         self.view_id = view_id
+        self.challenge = self.make_challenge()
 
-    def new_challenge(self, regenerate: bool = True):
+    def make_challenge(self) -> Challenge:
         raise NotImplementedError
 
+    def set_seed(self, seed: Optional[int]):
+        """Seeds the generator, so that the following challenges can be
+        reproduced."""
+        self.challenge.set_seed(seed)
+
+    def new_challenge(self, regenerate: bool = True):
+        d = load_settings(self.view_id)
+        self.challenge.new(d, regenerate)
+        self.set_items(self.challenge.items, d['primes_are_red'])
+
+    def set_items(self, items: List[str], primes_are_red: bool):
+        # Only tested when shown, like the math answer.
+        self.prime_flags = prime_flags(items) if primes_are_red else []
+        self.items_version += 1
+        self.page = 0
+        self.blank = False
+        self.items = items
+        # Same items as before don't trigger the reactive refresh.
+        self.refresh()
+
     def format_challenge_plain(self) -> str:
-        raise NotImplementedError
+        if self.show_numbers:
+            return self.challenge.text()
+        else:
+            return self.challenge.masked_text()
 
     def format_challenge_rich(self) -> Text:
         raise NotImplementedError
 
     def generate_answer(self) -> str:
-        raise NotImplementedError
+        return self.challenge.answer()
 
     def format_answer_plain(self) -> str:
         return self.generate_answer()
@@ -45,6 +94,12 @@ class ShowChallengeInterface(Widget):
             a.append("\n= " + answer)
             return a
 
+    def page_by(self, n: int):
+        self.page = min(max(0, self.page + n), self.page_count - 1)
+
+    def item_is_prime(self, idx: int) -> bool:
+        return idx < len(self.prime_flags) and self.prime_flags[idx]
+
     def show_next_item(self):
         if self.current_item < len(self.items) - 1:
             self.current_item += 1
@@ -53,9 +108,48 @@ class ShowChallengeInterface(Widget):
     #     # NOTE: Not needed: self.new_challenge()
     #     # challenge.new_challenge() will call show_challenge.new_challenge()
 
+    def get_render_key(self) -> RenderKey:
+        # Settings such as 'primes are red' change the text too.
+        return (self.state,
+                self.show_numbers,
+                self.blank,
+                self.current_item,
+                self.items_version,
+                len(self.items),
+                store.version(self.view_id))
+
     def render(self):
-        if self.state in [State.SHOW_ANSWER, State.CORRECT]:
-            text: Text = self.format_answer_rich()
-        else:
-            text: Text = self.format_challenge_rich()
-        return Align.center(text, vertical="middle")
+        key = self.get_render_key()
+        if self.render_text is None or key != self.render_key:
+            if self.state in [State.SHOW_ANSWER, State.CORRECT]:
+                self.render_text = self.format_answer_rich()
+            elif self.blank and self.show_numbers:
+                self.render_text = Text("")
+            else:
+                self.render_text = self.format_challenge_rich()
+            self.render_key = key
+
+        width, height = self.size
+        if width <= 0 or height <= 0:
+            return Align.center(self.render_text, vertical="middle")
+
+        # Wrap once per text and width, and only render the rows which fit,
+        # so that a frame doesn't cost more for a longer challenge.
+        if self.wrapped_lines is None or self.wrapped_for != (key, width):
+            self.wrapped_lines = self.render_text.wrap(self.console, width)
+            self.wrapped_for = (key, width)
+
+        lines = self.wrapped_lines
+        if len(lines) <= height:
+            self.page_count = 1
+            return Align.center(Text("\n").join(lines), vertical="middle")
+
+        # The last row shows the page.
+        rows = max(1, height - 1)
+        pages = (len(lines) + rows - 1) // rows
+        self.page_count = pages
+        page = min(self.page, pages - 1)
+        text = Text("\n").join(lines[page * rows:(page + 1) * rows])
+        text.append(f"\n({page + 1}/{pages}, PgUp/PgDn)", style="dim")
+
+        return Align.center(text, vertical="top")
@@ -2,16 +2,10 @@
 
 # Static Number Sequence
 
-import re
-import math
-from random import randint
-import json
-from typing import List
-
 from rich.text import Text
 
-from memory_master_mind.types import StaticNumId, load_settings, is_prime
-import memory_master_mind.db as db
+from memory_master_mind.engine import Challenge, NumberSequence
+from memory_master_mind.types import StaticNumId, load_settings, parse_seconds, save_settings
 from memory_master_mind.components.footer import Footer
 from memory_master_mind.components.form_label import FormLabel
 from memory_master_mind.components.input_answer import InputAnswer
@@ -20,26 +14,8 @@ from memory_master_mind.components.preferences_interface import PreferencesInter
 from memory_master_mind.components.input_text import InputText
 
 class ShowNumbers(ShowChallengeInterface):
-    def new_challenge(self, regenerate: bool = True):
-        d = load_settings(self.view_id)
-        a: List[str] = []
-        for _ in range(0, d['level']):
-            range_from = int(math.pow(10, d['digits_min']- 1)) - 1
-            range_to = int(math.pow(10, d['digits_max'])) - 1
-
-            n = randint(range_from, range_to)
-            if d['zero_padded']:
-                a.append(str(n).rjust(d['digits_max'], '0'))
-            else:
-                a.append(str(n))
-        self.items = a
-
-    def format_challenge_plain(self) -> str:
-        text = " ".join(self.items)
-        if not self.show_numbers:
-            text = re.sub('.', '-', text)
-
-        return text
+    def make_challenge(self) -> Challenge:
+        return NumberSequence()
 
     def format_challenge_rich(self) -> Text:
         if self.show_numbers:
@@ -49,29 +25,26 @@ class ShowNumbers(ShowChallengeInterface):
                 if idx != 0:
                     text.append(" ")
 
-                if i.isdigit() and d['primes_are_red'] and is_prime(int(i)):
+                if d['primes_are_red'] and self.item_is_prime(idx):
                     text.append(i, style="red")
                 else:
                     text.append(i)
 
         else:
-            s = " ".join(self.items)
-            s = re.sub('.', '-', s)
-            text = Text(s)
+            text = Text(self.challenge.masked_text())
 
         return text
 
-    def generate_answer(self) -> str:
-        return " ".join(self.items)
-
 
 class PreferencesView(PreferencesInterface):
     def save_settings(self):
         d = load_settings(self.view_id)
 
-        for k in ['digits_min', 'digits_max', 'level_max', 'ch_per_level', 'seconds_per_level']:
+        for k in ['digits_min', 'digits_max', 'level_max', 'ch_per_level']:
             d[k] = int(self.inputs[k].content)
 
+        d['seconds_per_level'] = parse_seconds(self.inputs['seconds_per_level'].content, d['seconds_per_level'])
+
         if self.inputs['primes_are_red'].content == "True":
             d['primes_are_red'] = True
         else:
@@ -82,7 +55,7 @@ class PreferencesView(PreferencesInterface):
         else:
             d['zero_padded'] = False
 
-        db.save_settings(self.view_id, json.dumps(d))
+        save_settings(self.view_id, d)
 
     def setup_labels_inputs(self):
         d = load_settings(self.view_id)
@@ -96,10 +69,14 @@ class PreferencesView(PreferencesInterface):
         self.labels['zero_padded'] = FormLabel(label="Zero padded:")
 
         for k in ['digits_min', 'digits_max', 'level_max', 'ch_per_level', 'seconds_per_level']:
+            if k == 'seconds_per_level':
+                allow_regex = r'[0-9\.]'
+            else:
+                allow_regex = r'[0-9]'
             self.inputs[k] = InputText(
                 label=k,
                 content=str(d[k]),
-                allow_regex=r'[0-9]',
+                allow_regex=allow_regex,
                 input_height=1,
             )
 
@@ -132,14 +109,10 @@ class StaticNumSeqView(ChallengeInterface):
         self.preferences_view = PreferencesView(self.view_id)
 
         self.footer = Footer()
-        self.footer.level = self.current_level
+        self.footer.level = self.levels.level
 
         self.show_numbers = ShowNumbers(self.view_id)
         self.input_answer = InputAnswer(self.get_instruction())
 
     def get_instruction(self) -> str:
         return "Memorize the numbers, then type them."
-
-    def get_preferences_view(self):
-        self.preferences_view = PreferencesView(self.view_id)
-        return self.preferences_view
@@ -2,16 +2,10 @@
 
 # Timed Number Sequence
 
-import re
-import math
-from random import randint
-import json
-from typing import List
-
 from rich.text import Text
 
-from memory_master_mind.types import TimedNumId, is_prime, load_settings
-import memory_master_mind.db as db
+from memory_master_mind.engine import Challenge, NumberSequence
+from memory_master_mind.types import TimedNumId, load_settings, parse_seconds, save_settings
 from memory_master_mind.components.footer import Footer
 from memory_master_mind.components.form_label import FormLabel
 from memory_master_mind.components.input_answer import InputAnswer
@@ -20,51 +14,34 @@ from memory_master_mind.components.preferences_interface import PreferencesInter
 from memory_master_mind.components.input_text import InputText
 
 class ShowNumbers(ShowChallengeInterface):
-    def new_challenge(self, regenerate: bool = True):
-        d = load_settings(self.view_id)
-        a = []
-        for _ in range(0, d['level']):
-            range_from = int(math.pow(10, d['digits_min']- 1)) - 1
-            range_to = int(math.pow(10, d['digits_max'])) - 1
-
-            n = randint(range_from, range_to)
-            if d['zero_padded']:
-                a.append(str(n).rjust(d['digits_max'], '0'))
-            else:
-                a.append(str(n))
-        self.items = a
+    def make_challenge(self) -> Challenge:
+        return NumberSequence()
 
+    def new_challenge(self, regenerate: bool = True):
+        super().new_challenge(regenerate)
         self.current_item = 0
 
     def format_challenge_plain(self) -> str:
         if self.show_numbers:
-            text = self.items[self.current_item]
+            return self.items[self.current_item]
         else:
-            text = " ".join(self.items)
-            text = re.sub('.', '-', text)
-
-        return text
+            return self.challenge.masked_text()
 
     def format_challenge_rich(self) -> Text:
         if self.show_numbers:
             d = load_settings(self.view_id)
             s = self.items[self.current_item]
 
-            if s.isdigit() and d['primes_are_red'] and is_prime(int(s)):
+            if d['primes_are_red'] and self.item_is_prime(self.current_item):
                 text = Text(s, style="red")
             else:
                 text = Text(s)
 
         else:
-            s = " ".join(self.items)
-            s = re.sub('.', '-', s)
-            text = Text(s)
+            text = Text(self.challenge.masked_text())
 
         return text
 
-    def generate_answer(self) -> str:
-        return " ".join(self.items)
-
     def format_answer_rich(self) -> Text:
         d = load_settings(self.view_id)
         text = Text()
@@ -72,7 +49,7 @@ class ShowNumbers(ShowChallengeInterface):
             if idx != 0:
                 text.append(" ")
 
-            if i.isdigit() and d['primes_are_red'] and is_prime(int(i)):
+            if d['primes_are_red'] and self.item_is_prime(idx):
                 text.append(i, style="red")
             else:
                 text.append(i)
@@ -83,9 +60,11 @@ class PreferencesView(PreferencesInterface):
     def save_settings(self):
         d = load_settings(self.view_id)
 
-        for k in ['digits_min', 'digits_max', 'level_max', 'ch_per_level', 'seconds_per_level']:
+        for k in ['digits_min', 'digits_max', 'level_max', 'ch_per_level']:
             d[k] = int(self.inputs[k].content)
 
+        d['seconds_per_level'] = parse_seconds(self.inputs['seconds_per_level'].content, d['seconds_per_level'])
+
         if self.inputs['primes_are_red'].content == "True":
             d['primes_are_red'] = True
         else:
@@ -96,7 +75,7 @@ class PreferencesView(PreferencesInterface):
         else:
             d['zero_padded'] = False
 
-        db.save_settings(self.view_id, json.dumps(d))
+        save_settings(self.view_id, d)
 
     def setup_labels_inputs(self):
         d = load_settings(self.view_id)
@@ -110,10 +89,14 @@ class PreferencesView(PreferencesInterface):
         self.labels['zero_padded'] = FormLabel(label="Zero padded:")
 
         for k in ['digits_min', 'digits_max', 'level_max', 'ch_per_level', 'seconds_per_level']:
+            if k == 'seconds_per_level':
+                allow_regex = r'[0-9\.]'
+            else:
+                allow_regex = r'[0-9]'
             self.inputs[k] = InputText(
                 label=k,
                 content=str(d[k]),
-                allow_regex=r'[0-9]',
+                allow_regex=allow_regex,
                 input_height=1,
             )
 
@@ -146,7 +129,7 @@ class TimedNumSeqView(ChallengeInterface):
         self.preferences_view = PreferencesView(self.view_id)
 
         self.footer = Footer()
-        self.footer.level = self.current_level
+        self.footer.level = self.levels.level
 
         self.show_numbers = ShowNumbers(self.view_id)
         self.input_answer = InputAnswer(self.get_instruction())
@@ -157,34 +140,29 @@ class TimedNumSeqView(ChallengeInterface):
     def get_instruction(self) -> str:
         return "The numbers will appear one by one. Memorize, then type them."
 
-    def get_preferences_view(self):
-        self.preferences_view = PreferencesView(self.view_id)
-        return self.preferences_view
+    def show_item(self, k: int):
+        d = load_settings(self.view_id)
+        gap = min(0.5, d['seconds_per_level'] * 0.25)
 
-    def blink_number(self):
-        self.show_numbers.items.append("")
-        current = len(self.show_numbers.items) - 1
-        old_current_item = self.show_numbers.current_item
-        self.show_numbers.current_item = current
-        def reveal():
-            self.show_numbers.current_item = old_current_item
-            self.show_numbers.items.pop()
-        self.set_timer(0.5, reveal)
+        w = self.show_numbers
+        w.blank = True
+        version = w.items_version
 
-    def show_next_per_secs(self):
-        d = load_settings(self.view_id)
-        secs = d['seconds_per_level']
+        def reveal():
+            # Not if a new challenge started since.
+            if w.items_version == version:
+                w.current_item = k
+                w.blank = False
 
-        if (self.challenge_timer.seconds_remain - 1) % secs == 0:
-            self.show_numbers.show_next_item()
-            self.blink_number()
+        self.set_timer(gap, reveal)
 
-    def start_timer(self, seconds_per_level: int):
+    def start_timer(self, seconds_per_level: float):
         self.challenge_timer.stop_timer()
-        if seconds_per_level != 0:
-            secs = seconds_per_level * self.current_level
+        if seconds_per_level > 0:
+            secs = seconds_per_level * self.levels.level
             self.challenge_timer.start_timer(
                 secs=secs,
                 final_cb=self.do_started_answer,
-                tick_cb=self.show_next_per_secs,
+                tick_cb=self.show_item,
+                tick_interval=seconds_per_level,
             )
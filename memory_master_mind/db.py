@@ -1,62 +1,260 @@
 #!/usr/bin/env python3
 
 import sqlite3
-import contextlib
+import threading
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
+
+import memory_master_mind.db_worker as db_worker
+import memory_master_mind.errors as errors
 from memory_master_mind import DB_PATH
 
-def create_challenge_settings_table() -> None:
-    query = """
-        CREATE TABLE IF NOT EXISTS
-            challenge_settings(
-                id integer primary key autoincrement,
-                challenge VARCHAR UNIQUE not null,
-                settings_json VARCHAR not null
-            );
+if TYPE_CHECKING:
+    # types imports the store, which imports db.
+    from memory_master_mind.types import Stats
+
+# One long-lived connection per thread. sqlite3 connections can't be shared
+# across threads by default, so each thread which touches the db gets its own,
+# and closes it on that thread, see close_connections().
+_local = threading.local()
+_connections: List[sqlite3.Connection] = []
+_connections_lock = threading.Lock()
+_generation = 0
+
+# Prepared statements are cached per connection by their SQL text, so the
+# queries are kept as module constants.
+CACHED_STATEMENTS = 64
+
+CREATE_CHALLENGE_SETTINGS_QUERY = """
+    CREATE TABLE IF NOT EXISTS
+        challenge_settings(
+            id integer primary key autoincrement,
+            challenge VARCHAR UNIQUE not null,
+            settings_json VARCHAR not null
+        );
+"""
+
+UPSERT_SETTINGS_QUERY = """
+    INSERT INTO challenge_settings
+      (challenge, settings_json)
+    VALUES (?, ?)
+    ON CONFLICT(challenge) DO UPDATE
+    SET settings_json = excluded.settings_json;
+"""
+
+SELECT_SETTINGS_QUERY = """
+    SELECT * FROM challenge_settings
+    WHERE challenge = ?;
+"""
+
+SELECT_ALL_SETTINGS_QUERY = """
+    SELECT challenge, settings_json FROM challenge_settings;
+"""
+
+CREATE_STATS_QUERIES = [
+    """
+    CREATE TABLE IF NOT EXISTS
+        stats(
+            id integer primary key autoincrement,
+            datetime VARCHAR not null,
+            challenge VARCHAR not null,
+            level integer not null,
+            solved_in_secs REAL not null,
+            first_try integer not null,
+            settings_json VARCHAR
+        );
+    """,
     """
+    CREATE INDEX IF NOT EXISTS
+        stats_challenge_datetime ON stats(challenge, datetime);
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS
+        stats_challenge_level ON stats(challenge, level);
+    """,
+]
 
-    with contextlib.closing(sqlite3.connect(DB_PATH)) as connection:
-        with contextlib.closing(connection.cursor()) as cursor:
-            cursor.execute(query)
-            connection.commit()
+# Schema changes after the tables above, applied in order by migrate().
+# PRAGMA user_version is the number of migrations applied.
+MIGRATIONS: List[List[str]] = [
+    # Keystroke timing of the answer.
+    [
+        "ALTER TABLE stats ADD COLUMN first_key_ms REAL;",
+        "ALTER TABLE stats ADD COLUMN mean_key_interval_ms REAL;",
+        "ALTER TABLE stats ADD COLUMN hesitations integer;",
+        "ALTER TABLE stats ADD COLUMN item_pauses_ms VARCHAR;",
+    ],
+]
 
-def save_settings(challenge: str, settings_json: str) -> bool:
-    if get_settings(challenge):
-        query = """
-            UPDATE challenge_settings
-            SET settings_json = ?
-            WHERE challenge = ?;
-        """
-    else:
-        query = """
-            INSERT INTO challenge_settings
-              (settings_json, challenge)
-            VALUES (?, ?);
-        """
+INSERT_STATS_QUERY = """
+    INSERT INTO stats
+      (datetime, challenge, level, solved_in_secs, first_try, settings_json,
+       first_key_ms, mean_key_interval_ms, hesitations, item_pauses_ms)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+"""
+
+SELECT_STATS_QUERY = """
+    SELECT datetime, challenge, level, solved_in_secs, first_try, settings_json,
+           first_key_ms, mean_key_interval_ms, hesitations, item_pauses_ms
+    FROM stats
+    ORDER BY datetime;
+"""
+
+SELECT_CHALLENGE_STATS_QUERY = """
+    SELECT datetime, challenge, level, solved_in_secs, first_try, settings_json,
+           first_key_ms, mean_key_interval_ms, hesitations, item_pauses_ms
+    FROM stats
+    WHERE challenge = ?
+    ORDER BY datetime;
+"""
+
+def get_connection() -> sqlite3.Connection:
+    connection = getattr(_local, 'connection', None)
+    if connection is None or getattr(_local, 'generation', -1) != _generation:
+        connection = sqlite3.connect(DB_PATH, cached_statements=CACHED_STATEMENTS)
+        # WAL lets readers and the writer proceed without blocking each
+        # other, and with synchronous=NORMAL a commit doesn't fsync, only
+        # checkpoints do.
+        connection.execute("PRAGMA journal_mode=WAL;")
+        connection.execute("PRAGMA synchronous=NORMAL;")
+        _local.connection = connection
+        _local.generation = _generation
+        with _connections_lock:
+            _connections.append(connection)
+    return connection
+
+def close_connection() -> None:
+    """Closes the connection of the calling thread."""
+    connection = getattr(_local, 'connection', None)
+    if connection is None:
+        return
+    _local.connection = None
+    with _connections_lock:
+        if connection in _connections:
+            _connections.remove(connection)
+    connection.close()
+
+def close_connections() -> None:
+    """Closes the connections of the db worker and of the calling thread, each
+    on the thread which owns it, as sqlite3 requires. The last one to close
+    checkpoints the WAL. Call it before db_worker.stop(), after the queued
+    writes."""
+    global _generation
+    if db_worker.is_running() and not db_worker.is_worker_thread():
+        db_worker.submit(close_connection).result()
+    close_connection()
+    with _connections_lock:
+        # Other threads reconnect on their next query.
+        _generation += 1
+        _connections.clear()
+
+def create_challenge_settings_table() -> None:
+    connection = get_connection()
+    with connection:
+        connection.execute(CREATE_CHALLENGE_SETTINGS_QUERY)
 
+def save_settings(challenge: str, settings_json: str) -> bool:
     try:
-        with contextlib.closing(sqlite3.connect(DB_PATH)) as connection:
-            with contextlib.closing(connection.cursor()) as cursor:
-                cursor.execute(query, (settings_json, challenge))
-                connection.commit()
+        connection = get_connection()
+        with connection:
+            connection.execute(UPSERT_SETTINGS_QUERY, (challenge, settings_json))
         return True
     except Exception as e:
         print(str(e))
         return False
 
+def save_many_settings(rows: List[Tuple[str, str]]) -> bool:
+    """Upserts (challenge, settings_json) rows in one transaction."""
+    try:
+        connection = get_connection()
+        with connection:
+            connection.executemany(UPSERT_SETTINGS_QUERY, rows)
+        return True
+    except Exception as e:
+        errors.report(f"Saving settings: {e}")
+        return False
+
 def get_settings(challenge: str):
-    result = ""
-    select_query = """
-        SELECT * FROM challenge_settings
-        WHERE challenge = ?;
-    """
-    with contextlib.closing(sqlite3.connect(DB_PATH)) as connection:
-        with contextlib.closing(connection.cursor()) as cursor:
-            cursor.execute(select_query, (challenge,))
-            connection.commit()
-            result = cursor.fetchone()
+    connection = get_connection()
+    result = connection.execute(SELECT_SETTINGS_QUERY, (challenge,)).fetchone()
     # (1, 'numbers', 'cool')
     return result
 
+def get_all_settings() -> List[Tuple[str, str]]:
+    connection = get_connection()
+    return connection.execute(SELECT_ALL_SETTINGS_QUERY).fetchall()
+
+def create_stats_table() -> None:
+    connection = get_connection()
+    with connection:
+        for query in CREATE_STATS_QUERIES:
+            connection.execute(query)
+
+def insert_stats(rows: List["Stats"]) -> bool:
+    """Inserts a batch of stats rows in one transaction."""
+    params = [(r['datetime'],
+               r['challenge_name'],
+               r['level'],
+               r['solved_in_secs'],
+               int(r['first_try']),
+               r['settings'] or None,
+               r['first_key_ms'],
+               r['mean_key_interval_ms'],
+               r['hesitations'],
+               r['item_pauses_ms'] or None) for r in rows]
+    try:
+        connection = get_connection()
+        with connection:
+            connection.executemany(INSERT_STATS_QUERY, params)
+        return True
+    except Exception as e:
+        errors.report(f"Saving stats: {e}")
+        return False
+
+def iter_stats(challenge: Optional[str] = None, batch_size: int = 500) -> Iterator["Stats"]:
+    """Yields stats rows in datetime order, fetching them in batches."""
+    connection = get_connection()
+    if challenge is None:
+        cursor = connection.execute(SELECT_STATS_QUERY)
+    else:
+        cursor = connection.execute(SELECT_CHALLENGE_STATS_QUERY, (challenge,))
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if len(rows) == 0:
+                break
+            for r in rows:
+                yield {
+                    'datetime': r[0],
+                    'challenge_name': r[1],
+                    'level': r[2],
+                    'solved_in_secs': r[3],
+                    'first_try': bool(r[4]),
+                    'settings': r[5] or "",
+                    'first_key_ms': r[6],
+                    'mean_key_interval_ms': r[7],
+                    'hesitations': r[8],
+                    'item_pauses_ms': r[9] or "",
+                }
+    finally:
+        cursor.close()
+
+def migrate() -> None:
+    connection = get_connection()
+    # The write lock is taken before reading the version, so that two
+    # instances starting together don't both apply a migration.
+    connection.execute("BEGIN IMMEDIATE;")
+    try:
+        version = connection.execute("PRAGMA user_version;").fetchone()[0]
+        for queries in MIGRATIONS[version:]:
+            for query in queries:
+                connection.execute(query)
+        connection.execute(f"PRAGMA user_version = {max(version, len(MIGRATIONS))};")
+        connection.commit()
+    except Exception:
+        connection.rollback()
+        raise
+
 def db_init():
-    if not DB_PATH.exists():
-        create_challenge_settings_table()
+    create_challenge_settings_table()
+    create_stats_table()
+    migrate()
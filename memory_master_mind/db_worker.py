@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+# A dedicated thread for db work, so the Textual event loop never waits on
+# SQLite. Calls are queued with submit(), which returns a Future. Async code
+# which needs the result awaits run() instead.
+
+import asyncio
+import atexit
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Optional, Tuple, TypedDict
+
+class WorkerMetrics(TypedDict):
+    queue_depth: int
+    jobs_done: int
+    last_latency_ms: float
+    avg_latency_ms: float
+    max_latency_ms: float
+
+Job = Tuple[Future, Callable, tuple, dict]
+
+_queue: "queue.Queue[Optional[Job]]" = queue.Queue()
+_thread: Optional[threading.Thread] = None
+_thread_lock = threading.Lock()
+
+_jobs_done = 0
+_total_latency = 0.0
+_last_latency = 0.0
+_max_latency = 0.0
+
+def _run_worker():
+    global _jobs_done, _total_latency, _last_latency, _max_latency
+    while True:
+        job = _queue.get()
+        if job is None:
+            break
+        fut, fn, args, kwargs = job
+        if not fut.set_running_or_notify_cancel():
+            continue
+        t = time.perf_counter()
+        try:
+            fut.set_result(fn(*args, **kwargs))
+        except BaseException as e:
+            fut.set_exception(e)
+        latency = time.perf_counter() - t
+        _jobs_done += 1
+        _total_latency += latency
+        _last_latency = latency
+        _max_latency = max(_max_latency, latency)
+
+def is_running() -> bool:
+    return _thread is not None and _thread.is_alive()
+
+def is_worker_thread() -> bool:
+    return _thread is not None and threading.current_thread() is _thread
+
+def start():
+    global _thread
+    with _thread_lock:
+        if _thread is not None and _thread.is_alive():
+            return
+        _thread = threading.Thread(target=_run_worker, name="mmm-db-worker", daemon=True)
+        _thread.start()
+
+def stop():
+    """Runs the jobs already queued, then stops the thread."""
+    global _thread
+    with _thread_lock:
+        if _thread is None:
+            return
+        _queue.put(None)
+        _thread.join()
+        _thread = None
+
+def submit(fn: Callable, *args, **kwargs) -> Future:
+    """Queues fn(*args, **kwargs) to run on the worker thread."""
+    start()
+    fut: Future = Future()
+    _queue.put((fut, fn, args, kwargs))
+    return fut
+
+def wait_idle():
+    """Blocks until the jobs queued so far are done."""
+    if _thread is None or is_worker_thread():
+        return
+    submit(lambda: None).result()
+
+async def run(fn: Callable, *args, **kwargs) -> Any:
+    """Runs fn on the worker thread and awaits its result."""
+    return await asyncio.wrap_future(submit(fn, *args, **kwargs))
+
+def metrics() -> WorkerMetrics:
+    if _jobs_done > 0:
+        avg = _total_latency / _jobs_done
+    else:
+        avg = 0.0
+    return WorkerMetrics(
+        queue_depth = _queue.qsize(),
+        jobs_done = _jobs_done,
+        last_latency_ms = _last_latency * 1000,
+        avg_latency_ms = avg * 1000,
+        max_latency_ms = _max_latency * 1000,
+    )
+
+# Don't lose queued writes when a script exits without calling stop().
+atexit.register(stop)
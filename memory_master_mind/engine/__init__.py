@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+
+# Headless challenge engine: generation, answers, levels and checking, with no
+# textual dependency. The widgets in components/ are adapters over it.
+
+from memory_master_mind.engine.challenges import (
+    Challenge,
+    MathArithmetic,
+    NumberSequence,
+    Quote,
+    generate_numbers,
+    load_quotes,
+    quotes_source_path,
+)
+from memory_master_mind.engine.checker import AnswerChecker
+from memory_master_mind.engine.levels import LevelState
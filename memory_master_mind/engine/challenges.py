@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+
+# Challenge generation and answers, without the UI.
+#
+# A challenge takes the settings of its view as a dict and generates its
+# items with its own random.Random, so that a seeded challenge can be
+# reproduced. The widgets in components/ show the items and the answer.
+
+import math
+import random
+from pathlib import Path
+from typing import TYPE_CHECKING, FrozenSet, List, Optional
+
+import memory_master_mind.arith as arith
+from memory_master_mind.arith import Answer
+from memory_master_mind.normalize import ASCII_PUNCT
+from memory_master_mind.primes import is_prime_shown
+from memory_master_mind.quote_corpus import QuoteCorpus, QuoteRecord, quote_words_join
+
+if TYPE_CHECKING:
+    from memory_master_mind.types import Settings
+
+# Removes the characters of types.RE_PUNCT.
+STRIP_PUNCT = str.maketrans("", "", ASCII_PUNCT)
+
+class Challenge:
+    rng: random.Random
+    items: List[str]
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self.items = []
+
+    def set_seed(self, seed: Optional[int]):
+        """Seeds the generator, so that the following challenges can be
+        reproduced."""
+        self.rng = random.Random(seed)
+
+    def new(self, d: "Settings", regenerate: bool = True):
+        raise NotImplementedError
+
+    def text(self) -> str:
+        """The challenge as shown, in plain text."""
+        return " ".join(self.items)
+
+    def masked_text(self) -> str:
+        """The challenge while answering."""
+        return '-' * len(self.text())
+
+    def answer(self) -> str:
+        raise NotImplementedError
+
+def generate_numbers(d: "Settings", rng: random.Random) -> List[str]:
+    range_from, range_to = arith.operand_range(d['digits_min'], d['digits_max'])
+
+    a: List[str] = []
+    for _ in range(0, d['level']):
+        n = rng.randint(range_from, range_to)
+        if d['zero_padded']:
+            a.append(str(n).rjust(d['digits_max'], '0'))
+        else:
+            a.append(str(n))
+    return a
+
+class NumberSequence(Challenge):
+    """Static and Timed Number Sequence."""
+
+    def new(self, d: "Settings", regenerate: bool = True):
+        self.items = generate_numbers(d, self.rng)
+
+    def answer(self) -> str:
+        return " ".join(self.items)
+
+class MathArithmetic(Challenge):
+    # Solved when the challenge is generated.
+    solution: Optional[Answer] = None
+    solution_is_prime: bool = False
+
+    def new(self, d: "Settings", regenerate: bool = True):
+        # Generated within the evaluation budget, so it can be solved.
+        items = arith.generate_expression(d, self.rng)
+        self.solution = arith.solve(items, d['solve_frac_dec'])
+
+        # Only tested when shown, a long answer takes a while.
+        v = self.solution.value
+        self.solution_is_prime = d['primes_are_red'] and isinstance(v, int) and is_prime_shown(v)
+        self.items = items
+
+    def answer(self) -> str:
+        if len(self.items) > 0 and self.solution is not None:
+            return self.solution.text
+        else:
+            return ""
+
+def quotes_source_path(quotes_path: str, default: Path) -> Path:
+    """The quotes file in the settings if it exists, or the default."""
+    if quotes_path != "" and Path(quotes_path).expanduser().exists():
+        return Path(quotes_path).expanduser()
+    else:
+        return default
+
+def load_quotes(path: Path) -> QuoteCorpus:
+    """Loads the quotes from an offset index, a binary cache, or parses the
+    file and caches it."""
+    import struct
+    import memory_master_mind.quote_cache as quote_cache
+    import memory_master_mind.quote_index as quote_index
+
+    # Prefer an offset index built with 'mmm index build'.
+    try:
+        corpus = quote_index.load(path)
+    except (OSError, ValueError, struct.error):
+        corpus = None
+
+    if corpus is not None:
+        return corpus
+    elif path.stat().st_size >= quote_index.AUTO_INDEX_SIZE:
+        return quote_index.build(path)
+    else:
+        return quote_cache.load_or_build(path)
+
+class Quote(Challenge):
+    corpus: QuoteCorpus
+    record: Optional[QuoteRecord] = None
+    # Index of the current quote in the corpus, and of the quote to show next,
+    # e.g. the last one shown when the app was closed.
+    current_quote_idx: Optional[int] = None
+    next_quote_idx: Optional[int] = None
+    # Sorted indexes in record.words of the hidden words, and the same as a set.
+    hidden_words_idx: List[int]
+    hidden_words_set: FrozenSet[int] = frozenset()
+    # The hidden words without punctuation.
+    hidden_words: List[str]
+
+    def __init__(self, corpus: QuoteCorpus, seed: Optional[int] = None):
+        super().__init__(seed)
+        self.corpus = corpus
+        self.hidden_words_idx = []
+        self.hidden_words = []
+
+    def new(self, d: "Settings", regenerate: bool = True):
+        quotes = self.corpus
+        level = d['level']
+        words_max = d['words_max']
+
+        if level <= 2 and words_max > 20:
+            words_max = 20
+
+        if self.next_quote_idx is not None \
+           and self.next_quote_idx < len(quotes) \
+           and quotes[self.next_quote_idx].word_count <= words_max:
+            self.current_quote_idx = self.next_quote_idx
+            self.next_quote_idx = None
+            self.record = quotes[self.current_quote_idx]
+        elif regenerate or self.record is None:
+            self.next_quote_idx = None
+            idx = quotes.pick(words_max, self.current_quote_idx, self.rng)
+            if idx is None:
+                # No quote is short enough, use the shortest.
+                idx = quotes.by_word_count[0]
+            self.current_quote_idx = idx
+            self.record = quotes[idx]
+
+        record = self.record
+        assert record is not None
+        words = record.words
+        maskable = record.maskable
+
+        # Hide level*10 percent of words
+        if level >= 10:
+            total_hidden = len(maskable)
+        else:
+            total_hidden = math.floor(len(maskable) * (level/10))
+
+        total_hidden = min(max(total_hidden, 1), len(maskable))
+
+        self.hidden_words_idx = sorted(self.rng.sample(maskable, total_hidden))
+        self.hidden_words_set = frozenset(self.hidden_words_idx)
+        self.hidden_words = [words[i].translate(STRIP_PUNCT) for i in self.hidden_words_idx]
+
+        self.items = [record.text]
+
+    def format_quote(self, masked: bool, first_letter: bool = True) -> str:
+        """The quote, with the hidden words masked while answering."""
+        if self.record is None:
+            return ""
+        author = self.record.author
+
+        words: List[str] = list(self.record.words)
+        if masked:
+            hidden = self.hidden_words_set
+
+            def mask(w: str) -> str:
+                if len(w) > 2 and first_letter:
+                    return w[0] + '-' * (len(w) - 1)
+                else:
+                    return '-' * len(w)
+
+            words = [mask(w) if i in hidden else w for i, w in enumerate(words)]
+
+        body = quote_words_join(words)
+
+        if author.find('(') == -1:
+            return body + "\n\n" + author
+        else:
+            return body + " " + author
+
+    def text(self) -> str:
+        return self.format_quote(masked=False)
+
+    def masked_text(self) -> str:
+        return self.format_quote(masked=True)
+
+    def answer(self) -> str:
+        return " ".join(self.hidden_words)
@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+
+# Answer checking, see normalize.py.
+
+from memory_master_mind.normalize import normalize_answer
+
+class AnswerChecker:
+    # The correct answer, and normalized once.
+    answer: str
+    answer_normalized: str
+
+    def __init__(self, answer: str = ""):
+        self.set_answer(answer)
+
+    def set_answer(self, answer: str):
+        self.answer = answer
+        self.answer_normalized = normalize_answer(answer)
+
+    def check(self, text: str) -> bool:
+        return normalize_answer(text) == self.answer_normalized
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+
+# Level progression of a challenge view.
+#
+# The level of the next challenge goes up after ch_per_level challenges solved
+# on the first try, and down by one when the answer is shown or the challenge
+# is skipped. A wrong answer also lowers it, unless the challenge is then
+# solved, which keeps the level it was played at.
+
+class LevelState:
+    # Level of the current challenge.
+    level: int = 1
+    # Level of the next challenge, saved in the settings.
+    next_level: int = 1
+    level_max: int = 999
+    ch_per_level: int = 1
+    # Challenges solved on the first try at this level.
+    ch_per_current_level: int = 0
+    first_try: bool = True
+
+    def __init__(self, level: int = 1, level_max: int = 999, ch_per_level: int = 1):
+        self.start(level, level_max, ch_per_level)
+
+    def start(self, level: int, level_max: int, ch_per_level: int):
+        """A new challenge at the level from the settings."""
+        self.level = level
+        self.next_level = level
+        self.level_max = level_max
+        self.ch_per_level = ch_per_level
+        self.first_try = True
+
+    def reset(self):
+        self.ch_per_current_level = 0
+
+    def correct(self):
+        if self.first_try:
+            self.ch_per_current_level += 1
+            lvl = self.level + 1
+            if lvl <= self.level_max and self.ch_per_current_level >= self.ch_per_level:
+                self.ch_per_current_level = 0
+                self.next_level = lvl
+        else:
+            self.ch_per_current_level = 0
+            self.next_level = self.level
+
+    def wrong(self):
+        self.lower()
+        self.first_try = False
+
+    def lower(self):
+        """Shown the answer or skipped."""
+        if self.level <= 1:
+            return
+        self.ch_per_current_level = 0
+        self.next_level = self.level - 1
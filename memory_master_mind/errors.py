@@ -0,0 +1,22 @@
+#!/usr/bin/env python3
+
+# Errors of background work, such as the writes on the db worker. Printing
+# them would draw over the TUI, so they are queued here instead. The app
+# writes them to its log while it runs, and prints the rest when it exits.
+
+import queue
+from typing import List
+
+_errors: "queue.SimpleQueue[str]" = queue.SimpleQueue()
+
+def report(message: str):
+    _errors.put(message)
+
+def take() -> List[str]:
+    """The errors reported since the last call."""
+    res: List[str] = []
+    while True:
+        try:
+            res.append(_errors.get_nowait())
+        except queue.Empty:
+            return res
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+
+# Scripted headless sessions, run with `mmm drive`.
+#
+# MmmApp runs against a virtual terminal of a given size, with a driver which
+# reads no input, so it runs in CI without a TTY. A script of steps is fed to
+# it as Key events, and each step is timed until the app is idle again:
+#
+#   handler_ms  time in event and message handlers, e.g. on_key()
+#   render_ms   time in Update and Layout messages, which render the widgets
+#               and write them, and in full frames outside of those
+#   latency_ms  from posting the key to the last output it caused
+#   frames      full frames, App.refresh()
+#   updates     widget updates, App.display()
+#
+# textual has no hook around handlers, so MessagePump.dispatch_message() is
+# wrapped while the session runs. A handler which awaits other tasks includes
+# their time.
+#
+# As with bench.py, MMM_DIR must point to a scratch directory before app, db
+# or store are imported, so that each run starts from the default settings.
+# The challenge views are seeded when they are built.
+
+import asyncio
+import io
+import time
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, TypedDict
+
+# Keys which open each challenge from the home view.
+SCENARIO_KEYS: Dict[str, List[str]] = {
+    "static": ["down", "enter"],
+    "timed": ["down", "down", "enter"],
+    "math": ["down", "down", "down", "enter"],
+    "quotes": ["down", "down", "down", "down", "enter"],
+}
+
+# Polling interval while waiting for the app to be idle, and how long a step
+# may take. The timed challenge presents its items for seconds.
+IDLE_POLL_S = 0.001
+STEP_TIMEOUT_S = 10.0
+PRESENTATION_TIMEOUT_S = 120.0
+
+class StepTiming(TypedDict):
+    step: str
+    handler_ms: float
+    render_ms: float
+    latency_ms: Optional[float]
+    frames: int
+    updates: int
+    # Characters written to the terminal.
+    chars: int
+
+class Summary(TypedDict):
+    count: int
+    mean_ms: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+
+class DriveReport(TypedDict):
+    width: int
+    height: int
+    seed: int
+    steps: int
+    keys: int
+    wall_s: float
+    # Of the key steps.
+    handler: Summary
+    render: Summary
+    latency: Summary
+    frames: int
+    updates: int
+    chars: int
+    final_view: Optional[str]
+    final_state: Optional[str]
+    final_level: Optional[int]
+    # Solved challenges, out of the 'solve' steps.
+    solved: int
+    solves: int
+    # What the app printed when it panicked.
+    errors: List[str]
+    events: List[StepTiming]
+    ok: bool
+
+class Terminal(io.TextIOBase):
+    """Counts what is written instead of showing it."""
+    chars: int = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def isatty(self) -> bool:
+        return True
+
+    def write(self, s: str) -> int:
+        self.chars += len(s)
+        return len(s)
+
+def new_step(step: str) -> StepTiming:
+    return StepTiming(
+        step = step,
+        handler_ms = 0.0,
+        render_ms = 0.0,
+        latency_ms = None,
+        frames = 0,
+        updates = 0,
+        chars = 0,
+    )
+
+def summarize(values: List[float]) -> Summary:
+    if len(values) == 0:
+        return Summary(count=0, mean_ms=0.0, p50_ms=0.0, p95_ms=0.0, max_ms=0.0)
+    a = sorted(values)
+    return Summary(
+        count = len(a),
+        mean_ms = sum(a) / len(a),
+        p50_ms = a[len(a) // 2],
+        p95_ms = a[min(len(a) - 1, int(len(a) * 0.95))],
+        max_ms = a[-1],
+    )
+
+def scenario_script(scenario: str) -> List[str]:
+    """'static:10' opens the static challenge from home and solves it ten
+    times."""
+    name, _, n = scenario.partition(":")
+    if name not in SCENARIO_KEYS:
+        raise ValueError(f"Unknown scenario: {name}, expected one of {', '.join(SCENARIO_KEYS)}")
+    count = int(n) if n != "" else 1
+    return SCENARIO_KEYS[name] + ["solve", "n"] * count
+
+def read_script(path: Path) -> List[str]:
+    """One step per line, blank lines and lines starting with # are skipped."""
+    steps: List[str] = []
+    with open(path, "r", encoding="utf8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.strip() == "" or line.startswith("#"):
+                continue
+            steps.append(line)
+    return steps
+
+def make_app_class():
+    # Imported here, MMM_DIR is resolved when app is imported.
+    from rich.console import Console
+    from textual import events
+    from textual.driver import Driver
+    from textual.geometry import Size
+
+    from memory_master_mind.app import MmmApp
+    from memory_master_mind.components.challenge_interface import ChallengeInterface
+
+    class HeadlessDriver(Driver):
+        """Sends the terminal size, and reads no input."""
+
+        def start_application_mode(self):
+            width, height = self.console.size
+            self._target.post_message_no_wait(events.Resize(self._target, Size(width, height)))
+
+        def disable_input(self):
+            pass
+
+        def stop_application_mode(self):
+            pass
+
+    class HeadlessApp(MmmApp):
+        terminal: Console
+        seed: int
+        step: StepTiming
+        # Dispatches in progress, and render dispatches among them.
+        busy: int = 0
+        rendering: int = 0
+        last_output_ns: int = 0
+
+        def __init__(self, width: int, height: int, seed: int):
+            self.terminal = Console(file=Terminal(),
+                                    width=width,
+                                    height=height,
+                                    force_terminal=True,
+                                    color_system="truecolor",
+                                    legacy_windows=False)
+            self.seed = seed
+            self.step = new_step("start")
+            super().__init__(driver_class=HeadlessDriver, title="MMM")
+
+        @property
+        def console(self) -> Console:
+            return self.terminal
+
+        @console.setter
+        def console(self, console: Console):
+            # App replaces the console when the driver starts, the virtual
+            # terminal stays.
+            pass
+
+        def get_challenge_view(self, name: str) -> ChallengeInterface:
+            is_new = name not in self.challenge_views
+            view = super().get_challenge_view(name)
+            if is_new:
+                view.show_numbers.set_seed(self.seed ^ zlib.crc32(name.encode("utf8")))
+            return view
+
+        def output(self, t: int, full: bool):
+            now = time.perf_counter_ns()
+            if self.rendering == 0:
+                self.step['render_ms'] += (now - t) / 1e6
+            if full:
+                self.step['frames'] += 1
+            else:
+                self.step['updates'] += 1
+            self.last_output_ns = now
+
+        def refresh(self, repaint: bool = True, layout: bool = False) -> None:
+            t = time.perf_counter_ns()
+            super().refresh(repaint, layout)
+            self.output(t, full=True)
+
+        def display(self, renderable) -> None:
+            t = time.perf_counter_ns()
+            super().display(renderable)
+            self.output(t, full=False)
+
+        def is_idle(self) -> bool:
+            if self.busy > 0:
+                return False
+            for pump in [self] + list(self.children):
+                if not pump._message_queue.empty() or pump._pending_message is not None:
+                    return False
+            return True
+
+    return HeadlessApp
+
+@contextmanager
+def timed_dispatch(app) -> Iterator[None]:
+    """Adds the time of each dispatched message to app.step."""
+    from textual import messages
+    from textual.message_pump import MessagePump
+
+    original = MessagePump.dispatch_message
+
+    async def dispatch_message(pump, message):
+        is_render = isinstance(message, (messages.Update, messages.Layout))
+        app.busy += 1
+        if is_render:
+            app.rendering += 1
+        render_before = app.step['render_ms']
+        t = time.perf_counter_ns()
+        try:
+            return await original(pump, message)
+        finally:
+            ms = (time.perf_counter_ns() - t) / 1e6
+            app.busy -= 1
+            if is_render:
+                app.rendering -= 1
+                app.step['render_ms'] += ms
+            else:
+                # Full frames drawn by the handler count as render time.
+                app.step['handler_ms'] += max(0.0, ms - (app.step['render_ms'] - render_before))
+
+    MessagePump.dispatch_message = dispatch_message # type: ignore
+    try:
+        yield
+    finally:
+        MessagePump.dispatch_message = original # type: ignore
+
+async def wait_idle(app, timeout: float = STEP_TIMEOUT_S):
+    """Until no message is queued or dispatched, twice in a row."""
+    deadline = time.perf_counter() + timeout
+    quiet = 0
+    while quiet < 2 and time.perf_counter() < deadline:
+        await asyncio.sleep(IDLE_POLL_S)
+        quiet = quiet + 1 if app.is_idle() else 0
+
+async def wait_presentation(app):
+    """Until the challenge accepts keys, e.g. the timed challenge shows its
+    items first."""
+    from memory_master_mind.types import State
+    deadline = time.perf_counter() + PRESENTATION_TIMEOUT_S
+    while time.perf_counter() < deadline:
+        challenge = getattr(app, "current_challenge", None)
+        if challenge is None \
+           or not challenge.show_challenge_blocks_keys \
+           or challenge.state is not State.SHOW_CHALLENGE:
+            return
+        await asyncio.sleep(0.01)
+
+async def run_step(app, step: str, pace_s: float) -> List[StepTiming]:
+    """Runs a step, with the timing of each key it presses."""
+    from textual import events
+
+    timings: List[StepTiming] = []
+
+    async def press(key: str, step: str):
+        app.step = new_step(step)
+        chars = app.terminal.file.chars
+        t = time.perf_counter_ns()
+        app.last_output_ns = 0
+        await app.post_message(events.Key(app, key=key))
+        await wait_idle(app)
+        if app.last_output_ns > t:
+            app.step['latency_ms'] = (app.last_output_ns - t) / 1e6
+        app.step['chars'] = app.terminal.file.chars - chars
+        timings.append(app.step)
+        if pace_s > 0:
+            await asyncio.sleep(pace_s)
+
+    if step.startswith("sleep:"):
+        # Timers run meanwhile, their output is not timed.
+        app.step = new_step(step)
+        await asyncio.sleep(float(step[len("sleep:"):]))
+        await wait_idle(app)
+
+    elif step.startswith("type:"):
+        for ch in step[len("type:"):]:
+            await press(ch, step)
+
+    elif step == "solve":
+        await wait_presentation(app)
+        challenge = getattr(app, "current_challenge", None)
+        if challenge is not None:
+            for ch in challenge.show_numbers.format_answer_plain():
+                await press(ch, step)
+            if not challenge.input_answer.only_numbers and not app.menu_enabled:
+                # Enter is a line break in text answers while the menu is off.
+                await press("ctrl+i", step)
+            await press("enter", step)
+
+    else:
+        await press(step, step)
+
+    return timings
+
+async def run_session(width: int,
+                      height: int,
+                      seed: int,
+                      steps: List[str],
+                      pace_s: float) -> DriveReport:
+    from rich.console import Console
+    import memory_master_mind.db as db
+    import memory_master_mind.db_worker as db_worker
+    import memory_master_mind.stats as stats
+    import memory_master_mind.store as store
+    from memory_master_mind.types import State
+
+    db.db_init()
+
+    app = make_app_class()(width, height, seed)
+    t = time.perf_counter()
+    solved = 0
+    solves = 0
+
+    with timed_dispatch(app):
+        task = asyncio.create_task(app.process_messages())
+        # Until the first view is shown.
+        await wait_idle(app)
+
+        timings: List[StepTiming] = []
+        for step in steps:
+            timings.extend(await run_step(app, step, pace_s))
+            if step == "solve":
+                solves += 1
+                challenge = getattr(app, "current_challenge", None)
+                if challenge is not None and challenge.state is State.CORRECT:
+                    solved += 1
+
+        wall_s = time.perf_counter() - t
+
+        challenge = getattr(app, "current_challenge", None)
+        errors: List[str] = []
+        for renderable in app._exit_renderables:
+            out = io.StringIO()
+            Console(file=out, width=width).print(renderable)
+            errors.append(out.getvalue())
+
+        if not app._closed:
+            await app.shutdown()
+        try:
+            await asyncio.wait_for(task, timeout=STEP_TIMEOUT_S)
+        except asyncio.TimeoutError:
+            task.cancel()
+
+    store.flush(wait=True)
+    stats.flush(wait=True)
+    db.close_connections()
+    db_worker.stop()
+
+    keys = [x for x in timings if not x['step'].startswith("sleep:")]
+
+    return DriveReport(
+        width = width,
+        height = height,
+        seed = seed,
+        steps = len(steps),
+        keys = len(keys),
+        wall_s = wall_s,
+        handler = summarize([x['handler_ms'] for x in keys]),
+        render = summarize([x['render_ms'] for x in keys]),
+        latency = summarize([x['latency_ms'] for x in keys if x['latency_ms'] is not None]),
+        frames = sum(x['frames'] for x in timings),
+        updates = sum(x['updates'] for x in timings),
+        chars = sum(x['chars'] for x in timings),
+        final_view = None if challenge is None else type(challenge).__name__,
+        final_state = None if challenge is None else challenge.state.name,
+        final_level = None if challenge is None else challenge.levels.level,
+        solved = solved,
+        solves = solves,
+        errors = errors,
+        events = timings,
+        ok = (len(errors) == 0 and solved == solves),
+    )
+
+def run(steps: List[str],
+        width: int = 100,
+        height: int = 30,
+        seed: int = 0,
+        pace_s: float = 0.0) -> DriveReport:
+    return asyncio.run(run_session(width, height, seed, steps, pace_s))
+
+def format_summary(name: str, s: Summary) -> str:
+    return f"{name:8} p50 {s['p50_ms']:8.2f} ms  p95 {s['p95_ms']:8.2f} ms  max {s['max_ms']:8.2f} ms  mean {s['mean_ms']:8.2f} ms"
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+# Keystroke timing of an answer.
+#
+# Each key which edits the answer is timestamped with perf_counter_ns(),
+# together with the index of the answer item (number or word) it belongs to.
+# From these, the metrics separate thinking time, the pause before the first
+# key of an item, from typing time, the keys within an item.
+
+import time
+from array import array
+from typing import List, Optional, TypedDict
+
+# An interval is a hesitation when it is this many times the median interval,
+# and at least HESITATION_MIN_MS.
+HESITATION_FACTOR = 3.0
+HESITATION_MIN_MS = 500.0
+
+# Item index of keys which don't belong to an item: separators, backspace.
+NO_ITEM = -1
+
+class KeystrokeMetrics(TypedDict):
+    keys: int
+    # From the start of the challenge.
+    first_key_ms: Optional[float]
+    mean_key_interval_ms: Optional[float]
+    hesitations: int
+    # Pause before the first key of each item, the first from the start.
+    item_pauses_ms: List[float]
+    thinking_ms: float
+    typing_ms: float
+
+def median(a: List[float]) -> float:
+    # Not statistics.median(), importing statistics is slow for the startup.
+    s = sorted(a)
+    n = len(s)
+    if n % 2 == 1:
+        return s[n // 2]
+    return (s[n // 2 - 1] + s[n // 2]) / 2
+
+class KeyLog:
+    start_ns: int
+    times: array
+    items: array
+
+    def __init__(self):
+        self.start()
+
+    def start(self):
+        self.start_ns = time.perf_counter_ns()
+        self.times = array('q')
+        self.items = array('i')
+
+    def record(self, item: int = NO_ITEM):
+        self.times.append(time.perf_counter_ns())
+        self.items.append(item)
+
+    def elapsed_ns(self) -> int:
+        return time.perf_counter_ns() - self.start_ns
+
+    def metrics(self) -> KeystrokeMetrics:
+        n = len(self.times)
+        if n == 0:
+            return KeystrokeMetrics(
+                keys = 0,
+                first_key_ms = None,
+                mean_key_interval_ms = None,
+                hesitations = 0,
+                item_pauses_ms = [],
+                thinking_ms = 0.0,
+                typing_ms = 0.0,
+            )
+
+        # Interval before each key, the first from the start.
+        prev = self.start_ns
+        intervals: List[float] = []
+        for t in self.times:
+            intervals.append((t - prev) / 1e6)
+            prev = t
+
+        limit = max(HESITATION_MIN_MS, HESITATION_FACTOR * median(intervals))
+        hesitations = len([x for x in intervals if x >= limit])
+
+        item_pauses: List[float] = []
+        seen = set()
+        thinking = 0.0
+        for x, item in zip(intervals, self.items):
+            if item != NO_ITEM and item not in seen:
+                seen.add(item)
+                item_pauses.append(x)
+                thinking += x
+
+        if n > 1:
+            mean_interval: Optional[float] = sum(intervals[1:]) / (n - 1)
+        else:
+            mean_interval = None
+
+        return KeystrokeMetrics(
+            keys = n,
+            first_key_ms = intervals[0],
+            mean_key_interval_ms = mean_interval,
+            hesitations = hesitations,
+            item_pauses_ms = item_pauses,
+            thinking_ms = thinking,
+            typing_ms = sum(intervals) - thinking,
+        )
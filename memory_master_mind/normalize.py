@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+
+# Answer normalization.
+#
+# An answer is compared after NFKC, casefold, removing punctuation and
+# collapsing whitespace, so that e.g. curly quotes, dashes, non-breaking
+# spaces or line breaks in a typed quote don't make it wrong.
+#
+# Punctuation is removed with one str.translate() table. It has the ASCII
+# characters of types.RE_PUNCT, and every Unicode punctuation character of the
+# blocks below which NFKC leaves as they are. The table is built on first use.
+
+import unicodedata
+from typing import Dict, Optional
+
+# Same as types.RE_PUNCT. Other ASCII punctuation, e.g. '+' or '%', is kept.
+ASCII_PUNCT = ".?!,;:'\"()/-"
+
+# Latin-1 Supplement, General Punctuation, Supplemental Punctuation,
+# CJK Symbols and Punctuation.
+UNICODE_PUNCT_BLOCKS = [
+    (0x00A0, 0x00FF),
+    (0x2000, 0x206F),
+    (0x2E00, 0x2E7F),
+    (0x3000, 0x303F),
+]
+
+_table: Optional[Dict[int, Optional[str]]] = None
+
+def translate_table() -> Dict[int, Optional[str]]:
+    global _table
+    if _table is None:
+        table: Dict[int, Optional[str]] = {ord(c): None for c in ASCII_PUNCT}
+        for lo, hi in UNICODE_PUNCT_BLOCKS:
+            for cp in range(lo, hi + 1):
+                c = chr(cp)
+                cat = unicodedata.category(c)
+                if cat.startswith('P'):
+                    table[cp] = None
+                elif cat.startswith('Z'):
+                    table[cp] = ' '
+        _table = table
+    return _table
+
+def normalize_answer(s: str) -> str:
+    if not s.isascii():
+        s = unicodedata.normalize('NFKC', s)
+    s = s.casefold().translate(translate_table())
+    return " ".join(s.split())
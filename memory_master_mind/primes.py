@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+
+# Primality tests for 'primes are red'.
+#
+# Numbers below SIEVE_LIMIT are looked up in a sieve of the odd numbers,
+# which is built on first use. Larger numbers are tested with Miller-Rabin,
+# which is deterministic with the first 13 primes as bases for n below
+# 3.3 * 10^24, and so for any 64-bit number. Above that the extra bases make
+# it a strong probable prime test.
+#
+# Numbers longer than PRIME_TEST_MAX_DIGITS are not tested, and shown as not
+# prime. A test of a prime with thousands of digits takes seconds.
+
+import math
+from typing import List, Optional, Sequence
+
+SIEVE_LIMIT = 1 << 20
+
+SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47, 53, 59, 61, 67, 71)
+
+# Deterministic bound of the first 13 bases.
+MR_DETERMINISTIC_LIMIT = 3317044064679887385961981
+
+# About 5 ms for a prime of this length, and 10^100 < 2^333.
+PRIME_TEST_MAX_DIGITS = 100
+PRIME_TEST_MAX_BITS = 333
+
+# Index i is 1 if 2*i + 1 is prime.
+_sieve: Optional[bytearray] = None
+
+def _build_sieve() -> bytearray:
+    n = SIEVE_LIMIT // 2
+    s = bytearray([1]) * n
+    s[0] = 0
+    for i in range(1, (math.isqrt(SIEVE_LIMIT) - 1) // 2 + 1):
+        if s[i]:
+            p = 2 * i + 1
+            start = p * p // 2
+            s[start::p] = bytes(len(range(start, n, p)))
+    return s
+
+def _miller_rabin(n: int, bases: Sequence[int]) -> bool:
+    d = n - 1
+    r = 0
+    while d % 2 == 0:
+        d //= 2
+        r += 1
+
+    for a in bases:
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(r - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+
+    return True
+
+def is_prime(n: int) -> bool:
+    global _sieve
+    if n < 2:
+        return False
+    if n < SIEVE_LIMIT:
+        if n % 2 == 0:
+            return n == 2
+        if _sieve is None:
+            _sieve = _build_sieve()
+        return _sieve[n // 2] == 1
+
+    for p in SMALL_PRIMES:
+        if n % p == 0:
+            return False
+
+    if n < MR_DETERMINISTIC_LIMIT:
+        return _miller_rabin(n, SMALL_PRIMES[:13])
+    return _miller_rabin(n, SMALL_PRIMES)
+
+def is_prime_shown(n: int) -> bool:
+    """is_prime() for the numbers short enough to test."""
+    return n.bit_length() <= PRIME_TEST_MAX_BITS and is_prime(n)
+
+def is_prime_item(s: str) -> bool:
+    """Whether a challenge item is a prime number. Zero padded numbers count,
+    negative numbers and other items don't."""
+    return s.isdigit() and len(s.lstrip("0")) <= PRIME_TEST_MAX_DIGITS and is_prime(int(s))
+
+def prime_flags(items: Sequence[str]) -> List[bool]:
+    return [is_prime_item(s) for s in items]
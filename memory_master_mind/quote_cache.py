@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+
+# Compiled quotes corpus cache.
+#
+# The parsed corpus of a quotes CSV is written to a binary file in MMM_DIR,
+# and later launches map it with mmap instead of parsing the CSV again.
+# Records are decoded from the map only when a quote is accessed.
+#
+# Layout, little-endian:
+#
+#   header       magic, version, source size, source mtime_ns, source sha256, n
+#   word_counts  n x u32, ascending
+#   by_count     n x u32, record indexes in word_counts order
+#   offsets      (n + 1) x u64, record start positions in the blob
+#   blob         per record: u32 text len, u32 author len, text, author,
+#                words joined with NUL
+#
+# The arrays are mapped as native u32 and u64 with memoryview.cast(), so only
+# hosts where those are little-endian and of that size use the files. Other
+# hosts neither write nor read them, and parse the source on every launch.
+#
+# The cache file name is derived from the source path. The cache is valid when
+# the source size and mtime match. If only the mtime changed, the content hash
+# decides, so a touched but unchanged file is not rebuilt.
+
+import csv
+import hashlib
+import io
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from memory_master_mind import MMM_DIR
+from memory_master_mind.quote_corpus import QuoteCorpus, QuoteRecord, make_record, parse_quote
+
+CACHE_DIR = MMM_DIR.joinpath('cache')
+
+MAGIC = b'MMMQ'
+VERSION = 1
+
+HEADER = struct.Struct('<4sIQq32sI')
+HEADER_SIZE = 64
+MTIME_OFFSET = struct.calcsize('<4sIQ')
+RECORD_HEAD = struct.Struct('<II')
+
+# Whether the layout matches the native 'I' and 'Q' of memoryview.cast().
+NATIVE_LAYOUT = (sys.byteorder == 'little' and struct.calcsize('I') == 4 and struct.calcsize('Q') == 8)
+
+WORD_SEP = "\x00"
+
+class SourceKey(NamedTuple):
+    size: int
+    mtime_ns: int
+    sha256: bytes
+
+def cache_path_for(source: Path) -> Path:
+    h = hashlib.sha1(str(source.resolve()).encode("utf8")).hexdigest()[:16]
+    return CACHE_DIR.joinpath(f"quotes-{h}.bin")
+
+def file_sha256(path: Path) -> bytes:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.digest()
+
+def pack_header(magic: bytes, key: SourceKey, n: int) -> bytes:
+    header = HEADER.pack(magic, VERSION, key.size, key.mtime_ns, key.sha256, n)
+    return header + b'\x00' * (HEADER_SIZE - len(header))
+
+class MappedRecords(Sequence):
+    """Records decoded on access from the mapped cache file."""
+
+    def __init__(self, buf: memoryview, offsets: Sequence[int], blob_start: int):
+        self.buf = buf
+        self.offsets = offsets
+        self.blob_start = blob_start
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, idx): # type: ignore
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError(idx)
+        start = self.blob_start + self.offsets[idx]
+        end = self.blob_start + self.offsets[idx + 1]
+        text_len, author_len = RECORD_HEAD.unpack_from(self.buf, start)
+        p = start + RECORD_HEAD.size
+        text = bytes(self.buf[p:p + text_len]).decode("utf8")
+        p += text_len
+        author = bytes(self.buf[p:p + author_len]).decode("utf8")
+        p += author_len
+        words = tuple(bytes(self.buf[p:end]).decode("utf8").split(WORD_SEP))
+        return make_record(text, author, words)
+
+def _encode_record(r: QuoteRecord) -> bytes:
+    text = r.text.encode("utf8")
+    author = r.author.encode("utf8")
+    words = WORD_SEP.join(r.words).encode("utf8")
+    return RECORD_HEAD.pack(len(text), len(author)) + text + author + words
+
+def save(cache_path: Path, key: SourceKey, corpus: QuoteCorpus) -> bool:
+    if not NATIVE_LAYOUT:
+        return False
+    n = len(corpus)
+    blob = io.BytesIO()
+    offsets: List[int] = [0]
+    for i in range(n):
+        r = corpus[i]
+        if any(WORD_SEP in w for w in r.words):
+            # Can't be stored with this layout.
+            return False
+        blob.write(_encode_record(r))
+        offsets.append(blob.tell())
+
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(".tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(pack_header(MAGIC, key, n))
+            f.write(struct.pack(f'<{n}I', *corpus.word_counts))
+            f.write(struct.pack(f'<{n}I', *corpus.by_word_count))
+            f.write(struct.pack(f'<{n + 1}Q', *offsets))
+            f.write(blob.getbuffer())
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        return False
+    return True
+
+def map_valid(path: Path, magic: bytes, source: Path) -> Optional[Tuple[mmap.mmap, int]]:
+    """Maps path and returns it with its record count, if the file is still
+    valid for source."""
+    if not NATIVE_LAYOUT or not path.exists():
+        return None
+
+    st = source.stat()
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size < HEADER_SIZE:
+            return None
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    file_magic, version, size, mtime_ns, sha256, n = HEADER.unpack_from(buf, 0)
+    if file_magic != magic or version != VERSION or size != st.st_size:
+        return None
+
+    if mtime_ns != st.st_mtime_ns:
+        if sha256 != file_sha256(source):
+            return None
+        # Same content, record the new mtime so the next launch skips hashing.
+        try:
+            with open(path, "r+b") as f:
+                f.seek(MTIME_OFFSET)
+                f.write(struct.pack('<q', st.st_mtime_ns))
+        except OSError:
+            pass
+
+    return (buf, n)
+
+def load(cache_path: Path, source: Path) -> Optional[QuoteCorpus]:
+    """The cached corpus for source, or None if there is no valid cache."""
+    m = map_valid(cache_path, MAGIC, source)
+    if m is None:
+        return None
+    return _map_corpus(*m)
+
+def _map_corpus(buf: mmap.mmap, n: int) -> QuoteCorpus:
+    mv = memoryview(buf)
+    p = HEADER_SIZE
+    word_counts = mv[p:p + 4 * n].cast('I')
+    p += 4 * n
+    by_word_count = mv[p:p + 4 * n].cast('I')
+    p += 4 * n
+    offsets = mv[p:p + 8 * (n + 1)].cast('Q')
+    p += 8 * (n + 1)
+    records = MappedRecords(mv, offsets, p)
+    return QuoteCorpus(records, by_word_count, word_counts)
+
+def parse_csv(data: bytes) -> QuoteCorpus:
+    # Read like a file opened in text mode, with universal newlines.
+    rows = csv.reader(io.TextIOWrapper(io.BytesIO(data), encoding="utf8"), delimiter=",", quotechar='"')
+    return QuoteCorpus([parse_quote(r[0]) for r in rows if len(r) > 0])
+
+def load_or_build(source: Path) -> QuoteCorpus:
+    """Loads the corpus from its cache, or parses the CSV and writes the
+    cache."""
+    cache_path = cache_path_for(source)
+    try:
+        corpus = load(cache_path, source)
+    except (OSError, ValueError, struct.error):
+        corpus = None
+    if corpus is not None:
+        return corpus
+
+    with open(source, "rb") as f:
+        data = f.read()
+    st = source.stat()
+    key = SourceKey(st.st_size, st.st_mtime_ns, hashlib.sha256(data).digest())
+
+    corpus = parse_csv(data)
+    save(cache_path, key, corpus)
+    return corpus
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+# Parsed quotes corpus.
+#
+# Each quote is parsed once when the corpus is loaded, and the records are
+# indexed by word count, so that selecting a quote under a words max is a
+# bisect instead of a scan over the corpus.
+
+import re
+from bisect import bisect_right
+from random import Random, randrange
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+RE_AUTHOR = re.compile(r'(\([^\)]+\))$')
+
+# Tokens which are shown but never hidden.
+UNMASKABLE = frozenset(["\n", "/", "-", "--"])
+
+class QuoteRecord(NamedTuple):
+    text: str
+    # Body words as split by quote_body_split(), including "\n" line markers.
+    words: Tuple[str, ...]
+    author: str
+    word_count: int
+    # Indexes in words which may be hidden.
+    maskable: Tuple[int, ...]
+
+def quote_to_body_and_author(quote: str) -> List[str]:
+    m = RE_AUTHOR.search(quote)
+    if m is not None:
+        author = m.group(1)
+        body = quote.replace(author, '').strip()
+    else:
+        lines = quote.split("\n")
+        if len(lines) > 1:
+            body = "\n".join(lines[0:-1]).strip()
+            author = lines[-1].strip()
+        else:
+            body = "\n".join(lines).strip()
+            author = "Unknown"
+
+    return [body, author]
+
+def body_split(body: str) -> List[str]:
+    a = []
+    for line in body.split("\n"):
+        a.extend(line.split(" "))
+        a.append("\n")
+
+    return a
+
+def quote_body_split(quote: str) -> List[str]:
+    (body, _) = quote_to_body_and_author(quote)
+    return body_split(body)
+
+def quote_words_join(words: Iterable[str]) -> str:
+    quote = " ".join(words)
+    quote = re.sub(r'\n +', '\n', quote)
+    return quote.strip()
+
+def make_record(text: str, author: str, words: Tuple[str, ...]) -> QuoteRecord:
+    maskable = tuple([idx for idx, w in enumerate(words) if w not in UNMASKABLE])
+    return QuoteRecord(
+        text=text,
+        words=words,
+        author=author,
+        word_count=len(words),
+        maskable=maskable,
+    )
+
+def parse_quote(quote: str) -> QuoteRecord:
+    (body, author) = quote_to_body_and_author(quote)
+    return make_record(quote, author, tuple(body_split(body)))
+
+class QuoteCorpus:
+    records: Sequence[QuoteRecord]
+    # Record indexes ordered by word count, and the word counts in the same
+    # order, for bisecting.
+    by_word_count: Sequence[int]
+    word_counts: Sequence[int]
+
+    def __init__(self,
+                 records: Sequence[QuoteRecord] = (),
+                 by_word_count: Optional[Sequence[int]] = None,
+                 word_counts: Optional[Sequence[int]] = None):
+        self.records = records
+        if by_word_count is None or word_counts is None:
+            by_word_count = sorted(range(len(records)), key=lambda i: records[i].word_count)
+            word_counts = [records[i].word_count for i in by_word_count]
+        self.by_word_count = by_word_count
+        self.word_counts = word_counts
+
+    @classmethod
+    def from_quotes(cls, quotes: Iterable[str]) -> "QuoteCorpus":
+        return cls([parse_quote(q) for q in quotes])
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __getitem__(self, idx: int) -> QuoteRecord:
+        return self.records[idx]
+
+    def count_words_max(self, words_max: int) -> int:
+        """Number of quotes with at most words_max words."""
+        return bisect_right(self.word_counts, words_max)
+
+    def pick(self,
+             words_max: int,
+             exclude_idx: Optional[int] = None,
+             rng: Optional[Random] = None) -> Optional[int]:
+        """A random record index with at most words_max words, other than
+        exclude_idx if there is a choice."""
+        rand = randrange if rng is None else rng.randrange
+        n = self.count_words_max(words_max)
+        if n == 0:
+            return None
+        k = rand(0, n)
+        if n > 1 and self.by_word_count[k] == exclude_idx:
+            k = (k + 1 + rand(0, n - 1)) % n
+        return self.by_word_count[k]
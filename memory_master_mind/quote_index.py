@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+
+# Offset index for large quotes files.
+#
+# Instead of holding the quotes, the index holds where each CSV record starts
+# in the source file and how long it is. The source is mapped with mmap and a
+# record is read and parsed only when the quote is accessed, so memory use
+# doesn't grow with the size of the corpus.
+#
+# Layout, little-endian, with the same header as the corpus cache, and like the
+# cache only written and read where that is the native layout:
+#
+#   header       magic, version, source size, source mtime_ns, source sha256, n
+#   offsets      n x u64, record start in the source
+#   lengths      n x u32, record length in bytes, without the line ending
+#   word_counts  n x u32, ascending
+#   by_count     n x u32, record indexes in word_counts order
+#
+# Build it with 'mmm index build'. Sources larger than AUTO_INDEX_SIZE are
+# indexed when they are first loaded, since the corpus cache would keep a
+# second copy of every quote.
+
+import csv
+import hashlib
+import io
+import mmap
+import os
+from array import array
+from pathlib import Path
+from typing import Iterator, Optional, Sequence, Tuple
+
+import memory_master_mind.errors as errors
+from memory_master_mind import MMM_DIR
+from memory_master_mind.quote_cache import NATIVE_LAYOUT, SourceKey, HEADER_SIZE, map_valid, pack_header
+from memory_master_mind.quote_corpus import QuoteCorpus, parse_quote
+
+INDEX_DIR = MMM_DIR.joinpath('index')
+
+MAGIC = b'MMMI'
+
+AUTO_INDEX_SIZE = 32 * 1024 * 1024
+
+def index_path_for(source: Path) -> Path:
+    h = hashlib.sha1(str(source.resolve()).encode("utf8")).hexdigest()[:16]
+    return INDEX_DIR.joinpath(f"quotes-{h}.idx")
+
+def scan_records(buf: mmap.mmap) -> Iterator[Tuple[int, int]]:
+    """Yields (offset, length) of each CSV record in buf, skipping blank lines.
+
+    A newline ends the record when the record has an even number of quote
+    characters so far. Escaped quotes come in pairs, so they don't change it."""
+    size = len(buf)
+    p = 0
+    while p < size:
+        start = p
+        quotes = 0
+        while True:
+            nl = buf.find(b'\n', p)
+            end = size if nl == -1 else nl
+            quotes += buf[p:end].count(b'"')
+            p = end + 1
+            if quotes % 2 == 0 or nl == -1:
+                break
+
+        if end > start and buf[end - 1:end] == b'\r':
+            end -= 1
+        if end > start:
+            yield (start, end - start)
+
+def record_quote(data: bytes) -> str:
+    """The quote in the first field of a CSV record."""
+    # Same newlines as reading the file in text mode.
+    text = data.decode("utf8").replace("\r\n", "\n").replace("\r", "\n")
+    row = next(csv.reader(io.StringIO(text), delimiter=",", quotechar='"'), [])
+    if len(row) == 0:
+        return ""
+    return row[0]
+
+class IndexedRecords(Sequence):
+    """Records read from the mapped source file on access."""
+
+    def __init__(self, source_buf: mmap.mmap, offsets: Sequence[int], lengths: Sequence[int]):
+        self.source_buf = source_buf
+        self.offsets = offsets
+        self.lengths = lengths
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __getitem__(self, idx): # type: ignore
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if idx < 0 or idx >= len(self):
+            raise IndexError(idx)
+        start = self.offsets[idx]
+        data = self.source_buf[start:start + self.lengths[idx]]
+        return parse_quote(record_quote(data))
+
+def _map_source(source: Path) -> Optional[mmap.mmap]:
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def build(source: Path) -> QuoteCorpus:
+    """Indexes source, writes the index file and returns the indexed corpus."""
+    source_buf = _map_source(source)
+    if source_buf is None:
+        return QuoteCorpus()
+
+    st = source.stat()
+    key = SourceKey(st.st_size, st.st_mtime_ns, hashlib.sha256(source_buf).digest())
+
+    offsets = array('Q')
+    lengths = array('I')
+    counts = array('I')
+    for (start, length) in scan_records(source_buf):
+        offsets.append(start)
+        lengths.append(length)
+        counts.append(parse_quote(record_quote(source_buf[start:start + length])).word_count)
+
+    by_word_count = array('I', sorted(range(len(counts)), key=counts.__getitem__))
+    word_counts = array('I', (counts[i] for i in by_word_count))
+
+    if NATIVE_LAYOUT:
+        # tofile() writes the native layout, which is the file layout here.
+        index_path = index_path_for(source)
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = index_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(pack_header(MAGIC, key, len(offsets)))
+                for a in (offsets, lengths, word_counts, by_word_count):
+                    a.tofile(f)
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            errors.report(f"Quotes index {index_path}: {e}")
+
+    return QuoteCorpus(IndexedRecords(source_buf, offsets, lengths), by_word_count, word_counts)
+
+def load(source: Path) -> Optional[QuoteCorpus]:
+    """The indexed corpus for source, or None if there is no valid index."""
+    m = map_valid(index_path_for(source), MAGIC, source)
+    if m is None:
+        return None
+    (buf, n) = m
+
+    source_buf = _map_source(source)
+    if source_buf is None:
+        return None
+
+    mv = memoryview(buf)
+    p = HEADER_SIZE
+    offsets = mv[p:p + 8 * n].cast('Q')
+    p += 8 * n
+    lengths = mv[p:p + 4 * n].cast('I')
+    p += 4 * n
+    word_counts = mv[p:p + 4 * n].cast('I')
+    p += 4 * n
+    by_word_count = mv[p:p + 4 * n].cast('I')
+
+    return QuoteCorpus(IndexedRecords(source_buf, offsets, lengths), by_word_count, word_counts)
@@ -1,22 +1,185 @@
 #!/usr/bin/env python3
 
-import sys
-import typer
+# Command line entry point.
+#
+# `mmm` without arguments starts the app directly, typer is only imported to
+# parse the subcommands. See startup.py for the import time budget.
 
-app = typer.Typer()
-index_app = typer.Typer()
-app.add_typer(index_app, name="index")
+import sys
 
-@app.command()
 def cli():
     from memory_master_mind.app import start
     start()
 
+def typer_app():
+    import typer
+    from typing import List, Optional
+
+    app = typer.Typer()
+    index_app = typer.Typer()
+    app.add_typer(index_app, name="index")
+    stats_app = typer.Typer()
+    app.add_typer(stats_app, name="stats")
+
+    app.command("cli")(cli)
+
+    @stats_app.command("export")
+    def stats_export(path: Optional[str] = typer.Argument(None, help="CSV file to write, stdout if omitted."),
+                     challenge: Optional[str] = typer.Option(None, help="Only export this challenge.")):
+        """Export the saved stats as CSV."""
+        import memory_master_mind.db as db
+        from memory_master_mind.stats import export_csv
+        db.db_init()
+        if path is None:
+            export_csv(sys.stdout, challenge)
+        else:
+            with open(path, "w", encoding="utf8", newline="") as f:
+                export_csv(f, challenge)
+
+    @index_app.command("build")
+    def index_build(path: Optional[str] = typer.Argument(None, help="Quotes CSV file, the quotes path from the preferences if omitted.")):
+        """Build the offset index of a quotes file."""
+        import time
+        from pathlib import Path
+        import memory_master_mind.db as db
+        import memory_master_mind.errors as errors
+        import memory_master_mind.quote_index as quote_index
+        from memory_master_mind.components.quotes import quotes_source_path
+        if path is None:
+            db.db_init()
+            source = quotes_source_path()
+        else:
+            source = Path(path).expanduser()
+        t = time.perf_counter()
+        corpus = quote_index.build(source)
+        typer.echo(f"Indexed {len(corpus)} quotes from {source} in {time.perf_counter() - t:.1f}s")
+        for e in errors.take():
+            typer.echo(e, err=True)
+        if quote_index.NATIVE_LAYOUT:
+            typer.echo(f"Index: {quote_index.index_path_for(source)}")
+        else:
+            typer.echo("Index not written, its layout is not native on this platform.")
+
+    @app.command("startup")
+    def startup_check(runs: int = typer.Option(5, help="Measure this many times, keep the fastest."),
+                      budget_ms: Optional[float] = typer.Option(None, help="Import time budget, the default in startup.py if omitted."),
+                      top: int = typer.Option(10, help="Show this many of the slowest imports."),
+                      json_output: bool = typer.Option(False, "--json", help="Print the report as JSON.")):
+        """Check the startup import time against its budget, with python -X importtime."""
+        import json
+        import memory_master_mind.startup as startup
+        if budget_ms is None:
+            budget_ms = startup.STARTUP_BUDGET_MS
+        report = startup.check(runs=runs, budget_ms=budget_ms, top=top)
+        if json_output:
+            typer.echo(json.dumps(report, indent=2))
+        else:
+            typer.echo(f"Startup imports: {report['total_ms']:.1f} ms, budget {report['budget_ms']:.0f} ms, {report['modules']} modules")
+            for module, ms in report['slowest']:
+                typer.echo(f"{ms:8.1f} ms  {module}")
+            for module in report['deferred_imported']:
+                typer.echo(f"Imported at startup, should be deferred: {module}")
+        if not report['ok']:
+            raise typer.Exit(code=1)
+
+    @app.command("bench")
+    def bench_run(output: Optional[str] = typer.Option(None, help="Write the report as JSON to this file."),
+                  baseline: Optional[str] = typer.Option(None, help="Compare against a report saved with --output."),
+                  threshold: Optional[float] = typer.Option(None, help="Allowed slowdown against the baseline, e.g. 0.25, the defaults in bench.py if omitted."),
+                  only: Optional[str] = typer.Option(None, help="Only run the benchmarks whose name starts with this, e.g. 'init_quotes/'."),
+                  repeat: int = typer.Option(5, help="Repeat each benchmark this many times, keep the fastest."),
+                  seed: int = typer.Option(0, help="Seed of the generated challenges and corpora."),
+                  corpus_size: Optional[List[int]] = typer.Option(None, help="Synthetic quotes corpus size, can be repeated. 10k, 100k and 1M if omitted."),
+                  json_output: bool = typer.Option(False, "--json", help="Print the report as JSON.")):
+        """Run the benchmarks, and compare them against a baseline."""
+        import json
+        import os
+        import tempfile
+        from pathlib import Path
+        import memory_master_mind.bench as bench
+
+        # A scratch data dir, so that the user's settings and caches are
+        # untouched. It must be set before db and store are imported.
+        with tempfile.TemporaryDirectory(prefix="mmm-bench-") as data_dir:
+            os.environ['MMM_DIR'] = data_dir
+            report = bench.run(
+                Path(data_dir),
+                repeat = repeat,
+                seed = seed,
+                corpus_sizes = corpus_size if corpus_size else bench.QUOTE_CORPUS_SIZES,
+                only = only,
+                progress = None if json_output else typer.echo,
+            )
+
+        if baseline is not None:
+            report = bench.compare(report, bench.load_report(Path(baseline)), threshold)
+        if output is not None:
+            bench.save_report(Path(output), report)
+
+        if json_output:
+            typer.echo(json.dumps(report, indent=2))
+        else:
+            for r in report['regressions']:
+                typer.echo(f"Regression: {r['name']} {r['baseline_us']:.1f} us -> {r['current_us']:.1f} us ({r['ratio']:.2f}x, threshold {1 + r['threshold']:.2f}x)")
+        if not report['ok']:
+            raise typer.Exit(code=1)
+
+    @app.command("drive")
+    def drive_run(scenario: Optional[str] = typer.Option(None, help="Open a challenge from home and solve it N times, e.g. static:10, timed:3, math:10, quotes:5."),
+                  script: Optional[str] = typer.Option(None, help="File of steps, one per line: a key name such as 'down' or 'ctrl+h', 'type:TEXT', 'sleep:SECONDS' or 'solve'. Runs after the scenario, if both are given."),
+                  width: int = typer.Option(100, help="Terminal width."),
+                  height: int = typer.Option(30, help="Terminal height."),
+                  seed: int = typer.Option(0, help="Seed of the challenges."),
+                  pace_ms: float = typer.Option(0.0, help="Pause after each key, the app is idle before the next one regardless."),
+                  output: Optional[str] = typer.Option(None, help="Write the report as JSON to this file."),
+                  json_output: bool = typer.Option(False, "--json", help="Print the report as JSON.")):
+        """Run a scripted session without a terminal, and time each key."""
+        import json
+        import os
+        import tempfile
+        from pathlib import Path
+        import memory_master_mind.headless as headless
+
+        # The scenario first, so that a script continues from where it ends.
+        steps: List[str] = []
+        if scenario is not None or script is None:
+            try:
+                steps.extend(headless.scenario_script(scenario or "static:10"))
+            except ValueError as e:
+                typer.echo(str(e), err=True)
+                raise typer.Exit(code=2)
+        if script is not None:
+            steps.extend(headless.read_script(Path(script)))
+
+        # Each run starts from the default settings, see bench_run().
+        with tempfile.TemporaryDirectory(prefix="mmm-drive-") as data_dir:
+            os.environ['MMM_DIR'] = data_dir
+            report = headless.run(steps, width=width, height=height, seed=seed, pace_s=pace_ms / 1000)
+
+        if output is not None:
+            with open(output, "w", encoding="utf8") as f:
+                json.dump(report, f, indent=2)
+                f.write("\n")
+
+        if json_output:
+            typer.echo(json.dumps(report, indent=2))
+        else:
+            typer.echo(f"{report['keys']} keys in {report['wall_s']:.1f}s, {report['frames']} frames, {report['updates']} widget updates, solved {report['solved']}/{report['solves']}")
+            typer.echo(headless.format_summary("handler", report['handler']))
+            typer.echo(headless.format_summary("render", report['render']))
+            typer.echo(headless.format_summary("latency", report['latency']))
+            for error in report['errors']:
+                typer.echo(error, err=True)
+        if not report['ok']:
+            raise typer.Exit(code=1)
+
+    return app
+
 def main():
     if len(sys.argv) == 1:
         cli()
     else:
-        app()
+        typer_app()()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+
+# Startup import time budget.
+#
+# Runs a fresh interpreter with `python -X importtime`, importing what `mmm`
+# imports before the first frame, and sums the self time of every imported
+# module. Each run is a new process, so nothing is cached in sys.modules, but
+# the .pyc files are, like in an installed package.
+#
+# Modules in DEFERRED_MODULES are only needed by some commands or views, they
+# are imported on first use. The check fails if any of them is imported at
+# startup, so that a top-level import doesn't slip back in unnoticed.
+
+import subprocess
+import sys
+from typing import Dict, List, NamedTuple, Tuple, TypedDict
+
+# What `mmm` without arguments imports before it starts the app.
+STARTUP_MODULES = ["memory_master_mind.runner", "memory_master_mind.app"]
+
+# textual and rich are about 200 ms of this on a typical machine.
+STARTUP_BUDGET_MS = 350.0
+
+DEFERRED_MODULES = [
+    "typer",
+    "rich.markdown",
+    "memory_master_mind.components.static_number_sequence",
+    "memory_master_mind.components.timed_number_sequence",
+    "memory_master_mind.components.math_arithmetic",
+    "memory_master_mind.components.quotes",
+    "memory_master_mind.quote_cache",
+    "memory_master_mind.quote_index",
+]
+
+class ImportTime(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+class StartupReport(TypedDict):
+    total_ms: float
+    budget_ms: float
+    runs: int
+    modules: int
+    # Slowest by cumulative time, (module, ms).
+    slowest: List[Tuple[str, float]]
+    deferred_imported: List[str]
+    ok: bool
+
+def parse_importtime(stderr: str) -> List[ImportTime]:
+    """Parses the lines of -X importtime, e.g.
+    'import time:       776 |       8783 |   memory_master_mind.db'"""
+    result: List[ImportTime] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0])
+            cumulative_us = int(parts[1])
+        except ValueError:
+            # The header line.
+            continue
+        result.append(ImportTime(parts[2].strip(), self_us, cumulative_us))
+    return result
+
+def measure_once(modules: List[str] = STARTUP_MODULES) -> List[ImportTime]:
+    code = "; ".join(f"import {m}" for m in modules)
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          stdout=subprocess.DEVNULL,
+                          stderr=subprocess.PIPE,
+                          text=True,
+                          check=True)
+    return parse_importtime(proc.stderr)
+
+def check(runs: int = 5,
+          budget_ms: float = STARTUP_BUDGET_MS,
+          top: int = 10) -> StartupReport:
+    """Measures the startup imports, keeping the fastest of the runs."""
+    best: List[ImportTime] = []
+    best_total = -1
+    for _ in range(max(1, runs)):
+        times = measure_once()
+        total = sum(t.self_us for t in times)
+        if best_total < 0 or total < best_total:
+            best = times
+            best_total = total
+
+    by_module: Dict[str, ImportTime] = {t.module: t for t in best}
+    slowest = sorted(best, key=lambda t: t.cumulative_us, reverse=True)[:top]
+    deferred = [m for m in DEFERRED_MODULES if m in by_module]
+    total_ms = best_total / 1000
+
+    return StartupReport(
+        total_ms = total_ms,
+        budget_ms = budget_ms,
+        runs = runs,
+        modules = len(best),
+        slowest = [(t.module, t.cumulative_us / 1000) for t in slowest],
+        deferred_imported = deferred,
+        ok = (total_ms <= budget_ms and len(deferred) == 0),
+    )
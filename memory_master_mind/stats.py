@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+# Stats of solved challenges.
+#
+# Rows are buffered in memory and inserted into the stats table in batches on
+# the db worker thread, together with the settings flush. If a stats CSV path
+# is set, the same batch is also appended to that file.
+#
+# Several mmm instances may share one stats CSV, so a batch is appended with a
+# single write() while holding an exclusive advisory lock on the file, and the
+# header is only written if the file is still empty once the lock is held.
+# Otherwise the rows follow the columns of the existing header, so that a CSV
+# started by an older version keeps its format.
+
+import csv
+import io
+import json
+import os
+from pathlib import Path
+from typing import IO, Dict, Iterable, List, Optional, Tuple
+
+import memory_master_mind.db as db
+import memory_master_mind.db_worker as db_worker
+import memory_master_mind.errors as errors
+from memory_master_mind import IS_WINDOWS
+from memory_master_mind.types import Stats
+
+if not IS_WINDOWS:
+    import fcntl
+
+PENDING: List[Stats] = []
+PENDING_CSV: List[Tuple[Path, Stats]] = []
+
+CSV_HEADER = list(Stats.__annotations__.keys())
+
+def record(stats: Stats, csv_path: Optional[Path] = None):
+    PENDING.append(stats)
+    if csv_path is not None:
+        PENDING_CSV.append((csv_path, stats))
+
+def _format_ms(ms: Optional[float]) -> str:
+    return "" if ms is None else f"{ms:.0f}"
+
+def csv_row(stats: Stats, columns: List[str] = CSV_HEADER) -> List[str]:
+    """The row as it was written to the stats CSV before the db table, with
+    settings flattened to a "key=value|key=value" field. Unknown columns are
+    left empty."""
+    if stats['settings'] != "":
+        d = json.loads(stats['settings'])
+        setts = "|".join(map(lambda i: f"{i[0]}={i[1]}", d.items()))
+    else:
+        setts = ""
+
+    hesitations = stats['hesitations']
+    values = {
+        'datetime': stats['datetime'],
+        'challenge_name': stats['challenge_name'],
+        'level': str(stats['level']),
+        'solved_in_secs': f"{stats['solved_in_secs']:.1f}",
+        'first_try': str(stats['first_try']),
+        'settings': setts,
+        'first_key_ms': _format_ms(stats['first_key_ms']),
+        'mean_key_interval_ms': _format_ms(stats['mean_key_interval_ms']),
+        'hesitations': "" if hesitations is None else str(hesitations),
+        'item_pauses_ms': stats['item_pauses_ms'],
+    }
+
+    return [values.get(c, "") for c in columns]
+
+def write_csv(out: IO[str],
+              rows: Iterable[Stats],
+              header: bool = True,
+              columns: List[str] = CSV_HEADER):
+    writer = csv.writer(out, lineterminator="\n")
+    if header:
+        writer.writerow(columns)
+    for r in rows:
+        writer.writerow(csv_row(r, columns))
+
+def _read_header(fd: int) -> List[str]:
+    """Columns of the CSV header at the start of the file."""
+    # Writes go to the end with O_APPEND, wherever the offset is.
+    os.lseek(fd, 0, os.SEEK_SET)
+    data = b""
+    while b"\n" not in data:
+        chunk = os.read(fd, 4096)
+        if len(chunk) == 0:
+            break
+        data += chunk
+    line = data.split(b"\n", 1)[0].decode("utf8").rstrip("\r")
+    return next(csv.reader([line]), [])
+
+def _append_csv(csv_path: Path, rows: List[Stats]):
+    # O_RDWR, so that the header can be read under the same lock.
+    fd = os.open(csv_path, os.O_RDWR | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        if not IS_WINDOWS:
+            fcntl.flock(fd, fcntl.LOCK_EX)
+
+        buf = io.StringIO()
+        if os.fstat(fd).st_size == 0:
+            write_csv(buf, rows, header=True)
+        else:
+            write_csv(buf, rows, header=False, columns=_read_header(fd))
+        data = buf.getvalue().encode("utf8")
+
+        while len(data) > 0:
+            n = os.write(fd, data)
+            data = data[n:]
+    finally:
+        # Closing the file releases the lock.
+        os.close(fd)
+
+def _write_batch(rows: List[Stats], csv_rows: List[Tuple[Path, Stats]]):
+    db.insert_stats(rows)
+
+    by_path: Dict[Path, List[Stats]] = dict()
+    for p, r in csv_rows:
+        by_path.setdefault(p, []).append(r)
+    for p, a in by_path.items():
+        try:
+            _append_csv(p, a)
+        except OSError as e:
+            errors.report(f"Stats CSV {p}: {e}")
+
+def flush(wait: bool = False):
+    """Queues the buffered rows to be written on the db worker."""
+    if len(PENDING) == 0:
+        if wait:
+            db_worker.wait_idle()
+        return
+    rows = PENDING[:]
+    csv_rows = PENDING_CSV[:]
+    PENDING.clear()
+    PENDING_CSV.clear()
+
+    fut = db_worker.submit(_write_batch, rows, csv_rows)
+    if wait:
+        fut.result()
+
+def export_csv(out: IO[str], challenge: Optional[str] = None):
+    """Streams the stats table as CSV, without loading all rows in memory."""
+    write_csv(out, db.iter_stats(challenge))
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+
+# In-memory settings store in front of the challenge_settings table.
+#
+# All rows are read once on first access, later reads are served from memory.
+# Writes either go through to the db, or with defer=True are queued and
+# coalesced per challenge until the next flush(). Deferred writes are appended
+# to a small journal file first, so they survive a crash before the flush, and
+# the journal is replayed into the db on the next start.
+#
+# The journal and the db are only touched on the db_worker thread, callers
+# only update memory and queue the work. The worker runs the jobs in order, so
+# a flush finds the journal lines of the rows it writes. It rotates the journal
+# to a numbered file, which it removes once the rows are committed. If the
+# write fails, the rows which were not changed since go back to PENDING and
+# the current journal, and the rotated file is removed all the same, so that
+# it can't be replayed over rows committed later.
+
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Dict, IO, List, Optional, Tuple
+
+import memory_master_mind.db as db
+import memory_master_mind.db_worker as db_worker
+from memory_master_mind import MMM_DIR
+
+JOURNAL_PATH = MMM_DIR.joinpath('settings.journal')
+
+# How often the app flushes deferred writes.
+FLUSH_INTERVAL_SECS = 5.0
+
+SETTINGS: Dict[str, dict] = dict()
+VERSIONS: Dict[str, int] = dict()
+PENDING: Dict[str, str] = dict()
+_loaded = False
+_journal: Optional[IO[str]] = None
+_lock = threading.RLock()
+
+def _load_all():
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if _loaded:
+            return
+        for challenge, settings_json in db.get_all_settings():
+            SETTINGS[challenge] = json.loads(settings_json)
+        _loaded = True
+        _replay_journal()
+
+def preload():
+    """Reads all rows into memory. The app awaits this on the db worker at
+    startup, so that later reads never touch the db."""
+    _load_all()
+
+def _journal_paths() -> List[Path]:
+    def seq(p: Path) -> int:
+        try:
+            return int(p.suffix[1:])
+        except ValueError:
+            return 0
+    rotated = sorted(JOURNAL_PATH.parent.glob(JOURNAL_PATH.name + ".*"), key=seq)
+    return rotated + [JOURNAL_PATH]
+
+def _replay_journal():
+    # Move the journal aside too, the rows of a failed write are appended to a
+    # new one.
+    _journal_rotate()
+    replayed = [p for p in _journal_paths() if p.exists()]
+    if len(replayed) == 0:
+        return
+    for path in replayed:
+        with open(path, "r", encoding="utf8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                    challenge = entry['challenge']
+                    settings_json = json.dumps(entry['settings'])
+                except (ValueError, KeyError, TypeError):
+                    # A partially written last line from a crash.
+                    continue
+                SETTINGS[challenge] = entry['settings']
+                PENDING[challenge] = settings_json
+    # Runs once at startup, write the recovered rows right away.
+    rows = list(PENDING.items())
+    PENDING.clear()
+    _write_rows(rows, replayed, dict(VERSIONS))
+
+def _journal_line(view_id: str, settings_json: str) -> str:
+    return '{"challenge": %s, "settings": %s}\n' % (json.dumps(view_id), settings_json)
+
+def _journal_append(line: str):
+    """Runs on the db worker."""
+    global _journal
+    if _journal is None:
+        _journal = open(JOURNAL_PATH, "a", encoding="utf8")
+    _journal.write(line)
+    # Hand the line to the OS without waiting for the disk.
+    _journal.flush()
+
+def _journal_rotate() -> List[Path]:
+    """Closes the journal and renames it out of the way of new appends.
+    Returns the renamed file, which holds the rows being flushed."""
+    global _journal
+    if _journal is not None:
+        _journal.close()
+        _journal = None
+    if not JOURNAL_PATH.exists():
+        return []
+    rotated = JOURNAL_PATH.with_name(f"{JOURNAL_PATH.name}.{time.time_ns()}")
+    JOURNAL_PATH.rename(rotated)
+    return [rotated]
+
+def _write_rows(rows: List[Tuple[str, str]], journal_paths: List[Path], versions: Dict[str, int]) -> bool:
+    """Writes the rows taken from PENDING at the given VERSIONS."""
+    ok = db.save_many_settings(rows)
+    if not ok:
+        with _lock:
+            for challenge, settings_json in rows:
+                # A newer put() is pending or already written, it wins.
+                if VERSIONS.get(challenge, 0) != versions.get(challenge, 0):
+                    continue
+                PENDING[challenge] = settings_json
+                _journal_append(_journal_line(challenge, settings_json))
+    for p in journal_paths:
+        if p.exists():
+            p.unlink()
+    return ok
+
+def _write_pending(rows: List[Tuple[str, str]], versions: Dict[str, int]) -> bool:
+    """Runs on the db worker, after the journal lines of the rows."""
+    return _write_rows(rows, _journal_rotate(), versions)
+
+def get(view_id: str) -> Optional[dict]:
+    """Returns a shallow copy of the stored settings, or None if the challenge
+    has no row yet."""
+    _load_all()
+    d = SETTINGS.get(view_id)
+    if d is None:
+        return None
+    return dict(d)
+
+def put(view_id: str, d: dict, defer: bool = False) -> bool:
+    """Updates the store and writes the row to the db. With defer=True the
+    write is queued until the next flush()."""
+    _load_all()
+    with _lock:
+        SETTINGS[view_id] = dict(d)
+        VERSIONS[view_id] = VERSIONS.get(view_id, 0) + 1
+        PENDING[view_id] = json.dumps(d)
+        if defer:
+            # Queued under the lock, so that the worker appends the lines in
+            # the order of the puts.
+            db_worker.submit(_journal_append, _journal_line(view_id, PENDING[view_id]))
+            return True
+    # Flush everything, so that an older journal entry can't be replayed over
+    # this write later.
+    return flush()
+
+def flush(wait: bool = False) -> bool:
+    """Queues the pending rows to be written to the db in one transaction.
+    With wait=True, blocks until they are committed."""
+    rows: List[Tuple[str, str]] = []
+    versions: Dict[str, int] = dict()
+    fut = None
+    with _lock:
+        if len(PENDING) > 0:
+            rows = list(PENDING.items())
+            PENDING.clear()
+            versions = dict(VERSIONS)
+            if not db_worker.is_worker_thread():
+                fut = db_worker.submit(_write_pending, rows, versions)
+
+    # Not holding the lock, a failed write takes it to put its rows back.
+    if fut is not None:
+        return fut.result() if wait else True
+    if len(rows) > 0:
+        # Already on the worker.
+        return _write_pending(rows, versions)
+    if wait:
+        db_worker.wait_idle()
+    return True
+
+def version(view_id: str) -> int:
+    """Incremented on every put(), useful as a cache key for derived values."""
+    return VERSIONS.get(view_id, 0)
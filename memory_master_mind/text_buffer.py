@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+
+# Editable text with a cursor, for the answer and form inputs.
+#
+# A gap buffer of two lists: the characters before the cursor, and the
+# characters after it in reverse order. Typing, backspace and delete at the
+# cursor are O(1), and moving the cursor is O(1) per character, so a long
+# answer doesn't cost more per key. The joined text is cached until the next
+# edit, it is only needed when rendering and checking the answer.
+#
+# The number of words before the cursor is kept up to date with each change,
+# so the word being typed is known without scanning the text.
+
+from typing import List, Optional, Tuple
+
+# Keys of edit_key() which only move the cursor.
+MOVE_KEYS = {"left", "right", "ctrl+left", "ctrl+right", "home", "end", "ctrl+a", "ctrl+e"}
+
+def is_space(c: str) -> bool:
+    return c.isspace()
+
+class TextBuffer:
+    before: List[str]
+    # Reversed, after[-1] is the character at the cursor.
+    after: List[str]
+    # Words starting before the cursor.
+    words_before: int
+    # Cache of text(), None after an edit.
+    _text: Optional[str]
+
+    def __init__(self, text: str = ""):
+        self.set_text(text)
+
+    def set_text(self, text: str):
+        """Replaces the text, with the cursor at the end."""
+        self.before = list(text)
+        self.after = []
+        self.words_before = len(text.split())
+        self._text = text
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = "".join(self.before) + "".join(reversed(self.after))
+        return self._text
+
+    def split_at_cursor(self) -> Tuple[str, str]:
+        return ("".join(self.before), "".join(reversed(self.after)))
+
+    def __len__(self) -> int:
+        return len(self.before) + len(self.after)
+
+    @property
+    def cursor(self) -> int:
+        return len(self.before)
+
+    def current_word(self) -> int:
+        """Index of the word ending at the cursor, or -1 after a space."""
+        if len(self.before) == 0 or is_space(self.before[-1]):
+            return -1
+        return self.words_before - 1
+
+    def _changed(self):
+        self._text = None
+
+    def _push_before(self, c: str):
+        if not is_space(c) and (len(self.before) == 0 or is_space(self.before[-1])):
+            self.words_before += 1
+        self.before.append(c)
+
+    def _pop_before(self) -> str:
+        c = self.before.pop()
+        if not is_space(c) and (len(self.before) == 0 or is_space(self.before[-1])):
+            self.words_before -= 1
+        return c
+
+    def insert(self, s: str):
+        for c in s:
+            self._push_before(c)
+        self._changed()
+
+    def backspace(self, n: int = 1) -> bool:
+        n = min(n, len(self.before))
+        for _ in range(n):
+            self._pop_before()
+        if n > 0:
+            self._changed()
+        return n > 0
+
+    def delete(self, n: int = 1) -> bool:
+        n = min(n, len(self.after))
+        for _ in range(n):
+            self.after.pop()
+        if n > 0:
+            self._changed()
+        return n > 0
+
+    def left(self, n: int = 1) -> bool:
+        n = min(n, len(self.before))
+        for _ in range(n):
+            self.after.append(self._pop_before())
+        return n > 0
+
+    def right(self, n: int = 1) -> bool:
+        n = min(n, len(self.after))
+        for _ in range(n):
+            self._push_before(self.after.pop())
+        return n > 0
+
+    def word_back_len(self) -> int:
+        """Characters from the start of the previous word to the cursor."""
+        i = len(self.before)
+        while i > 0 and is_space(self.before[i - 1]):
+            i -= 1
+        while i > 0 and not is_space(self.before[i - 1]):
+            i -= 1
+        return len(self.before) - i
+
+    def word_forward_len(self) -> int:
+        """Characters from the cursor to the end of the next word."""
+        i = len(self.after)
+        while i > 0 and is_space(self.after[i - 1]):
+            i -= 1
+        while i > 0 and not is_space(self.after[i - 1]):
+            i -= 1
+        return len(self.after) - i
+
+    def line_back_len(self) -> int:
+        i = len(self.before)
+        while i > 0 and self.before[i - 1] != "\n":
+            i -= 1
+        return len(self.before) - i
+
+    def line_forward_len(self) -> int:
+        i = len(self.after)
+        while i > 0 and self.after[i - 1] != "\n":
+            i -= 1
+        return len(self.after) - i
+
+    def edit_key(self, key: str) -> bool:
+        """Applies an editing or cursor key. Returns whether the key was one."""
+        if key == "ctrl+h":
+            # ctrl+h is Backspace
+            self.backspace()
+        elif key == "delete":
+            self.delete()
+        elif key == "ctrl+w":
+            self.backspace(self.word_back_len())
+        elif key == "ctrl+delete":
+            self.delete(self.word_forward_len())
+        elif key == "ctrl+u":
+            self.backspace(self.line_back_len())
+        elif key == "ctrl+k":
+            self.delete(self.line_forward_len())
+        elif key == "left":
+            self.left()
+        elif key == "right":
+            self.right()
+        elif key == "ctrl+left":
+            self.left(self.word_back_len())
+        elif key == "ctrl+right":
+            self.right(self.word_forward_len())
+        elif key in ["home", "ctrl+a"]:
+            self.left(self.line_back_len())
+        elif key in ["end", "ctrl+e"]:
+            self.right(self.line_forward_len())
+        else:
+            return False
+        return True
@@ -1,12 +1,10 @@
 #!/usr/bin/env python3
 
-import json
 import re
-import math
 from enum import Enum
 from typing import List, Optional, TypedDict
 
-import memory_master_mind.db as db
+import memory_master_mind.store as store
 
 class State(int, Enum):
     SHOW_CHALLENGE = 0
@@ -41,27 +39,34 @@ def app_default_settings() -> AppSettings:
 
 def app_load_settings() -> AppSettings:
     view_id = AppId
-    res = db.get_settings(view_id)
-    if res:
-        d: AppSettings = json.loads(res[2])
+    res = store.get(view_id)
+    if res is not None:
+        d = app_default_settings()
+        d.update(res) # type: ignore
         return d
     else:
         d = app_default_settings()
-        s = json.dumps(d)
-        db.save_settings(view_id, s)
+        store.put(view_id, d) # type: ignore
         return d
 
+def app_save_settings(d: AppSettings) -> bool:
+    return store.put(AppId, d) # type: ignore
+
 
 class Settings(TypedDict):
     digits_min: int
     digits_max: int
     ch_per_level: int
-    seconds_per_level: int
+    # May be fractional, e.g. 0.4
+    seconds_per_level: float
     level: int
     level_max: int
     zero_padded: bool
     operations: List[str]
     negatives: bool
+    exact_division: bool
+    # 0 for no limit.
+    result_digits_max: int
     solve_frac_dec: int
     words_max: int
     quotes_path: str
@@ -80,6 +85,8 @@ def default_settings(view_id: Optional[str] = None) -> Settings:
         zero_padded = False,
         operations = ["+", "-"],
         negatives = False,
+        exact_division = False,
+        result_digits_max = 0,
         solve_frac_dec = 1,
         words_max = 999,
         quotes_path = "",
@@ -94,31 +101,47 @@ def default_settings(view_id: Optional[str] = None) -> Settings:
 
     return d
 
+# A whole or decimal number, the inputs only check each typed character.
+RE_SECONDS = re.compile(r'\d+(\.\d+)?')
+
+def parse_seconds(s: str, previous: float) -> float:
+    """Seconds from a preferences input, an int when it is whole. The
+    previous value if the input is not a number, e.g. '1.2.3' or '.'."""
+    if RE_SECONDS.fullmatch(s.strip()) is None:
+        return previous
+    x = float(s)
+    if x.is_integer():
+        return int(x)
+    return x
+
 def load_settings(view_id: str) -> Settings:
-    res = db.get_settings(view_id)
-    if res:
-        d: Settings = json.loads(res[2])
+    res = store.get(view_id)
+    if res is not None:
+        # Keys added in later versions fall back to their defaults.
+        d = default_settings(view_id)
+        d.update(res) # type: ignore
         return d
     else:
         d = default_settings(view_id)
-        s = json.dumps(d)
-        db.save_settings(view_id, s)
+        store.put(view_id, d) # type: ignore
         return d
 
+def save_settings(view_id: str, d: Settings, defer: bool = False) -> bool:
+    return store.put(view_id, d, defer=defer) # type: ignore
+
 
 class Stats(TypedDict):
     datetime: str
     challenge_name: str
-    level: str
-    solved_in_secs: str
-    first_try: str
+    level: int
+    solved_in_secs: float
+    first_try: bool
+    # Challenge settings as JSON, or empty when not included.
     settings: str
-
-
-def is_prime(n):
-    if n <= 1:
-        return False
-    for i in range(2, int(math.sqrt(n)) + 1):
-        if (n % i) == 0:
-            return False
-    return True
+    # Keystroke timing of the answer, see keystrokes.py. None for rows
+    # recorded before it was measured.
+    first_key_ms: Optional[float]
+    mean_key_interval_ms: Optional[float]
+    hesitations: Optional[int]
+    # Pause before each answer item, as "ms|ms|...".
+    item_pauses_ms: str
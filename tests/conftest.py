@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+
+# MMM_DIR is resolved on first access, point it to a scratch directory before
+# the tests import store or db, so that the user's data is not touched.
+
+import os
+import tempfile
+
+os.environ['MMM_DIR'] = tempfile.mkdtemp(prefix="mmm-test-")
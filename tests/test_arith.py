@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import math
+import random
+import time
+
+import pytest
+
+import memory_master_mind.arith as arith
+from memory_master_mind.types import MathArithId, default_settings
+
+# About a second at most here, with room for a slow machine.
+GENERATE_MAX_S = 5.0
+
+def trial_divisors(t: int, lo: int, hi: int):
+    res = []
+    for d in range(1, min(math.isqrt(t), hi, arith.DIVISOR_SEARCH_MAX) + 1):
+        if t % d == 0:
+            if lo <= d:
+                res.append(d)
+            e = t // d
+            if e != d and lo <= e <= hi:
+                res.append(e)
+    return res
+
+def test_divisors_in():
+    rng = random.Random(0)
+    for t in [1, 2, 12, 9973 * 9967, math.factorial(30), 2 ** 40 * 3 ** 5, 10 ** 30 + 7]:
+        for (lo, hi) in [(1, 10), (1, 10 ** 6), (5, 10 ** 40), (rng.randint(1, 100), t)]:
+            assert arith.divisors_in(t, lo, hi) == trial_divisors(t, lo, hi)
+
+@pytest.mark.parametrize("operations, negatives, exact_division, digits_max", [
+    (["*", "/"], False, True, 12),
+    (["*", "/"], False, False, 100),
+    (["*", "/"], True, False, 100),
+    (["*", "/"], True, True, 100),
+    (["+", "-", "*", "/"], True, False, 100),
+    (["+", "-", "*", "/"], False, False, 500),
+])
+def test_generate_at_level_max(operations, negatives, exact_division, digits_max):
+    d = default_settings(MathArithId)
+    d['operations'] = operations
+    d['negatives'] = negatives
+    d['exact_division'] = exact_division
+    d['digits_max'] = digits_max
+    d['level'] = d['level_max']
+
+    t = time.perf_counter()
+    items = arith.generate_expression(d, random.Random(0))
+    assert time.perf_counter() - t < GENERATE_MAX_S
+
+    # solve() raises ExpressionError over the evaluation budget.
+    answer = arith.solve(items, d['solve_frac_dec'])
+    assert arith.bits(answer.value) <= arith.MAX_BITS
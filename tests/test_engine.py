@@ -0,0 +1,20 @@
+#!/usr/bin/env python3
+
+import random
+
+import pytest
+
+from memory_master_mind.engine import generate_numbers
+from memory_master_mind.types import StaticNumId, default_settings
+
+@pytest.mark.parametrize("digits_min, digits_max", [(0, 0), (0, 1), (0, 3), (1, 1), (2, 5)])
+def test_generate_numbers(digits_min, digits_max):
+    d = default_settings(StaticNumId)
+    d['digits_min'] = digits_min
+    d['digits_max'] = digits_max
+    d['level'] = 50
+    items = generate_numbers(d, random.Random(0))
+    assert len(items) == 50
+    for s in items:
+        n = int(s)
+        assert 0 <= n < 10 ** max(1, digits_max)